@@ -1,29 +1,13 @@
 # -*- coding: utf-8 -*-
 import os
 import logging
-import re
 import sys
 
+from geom_index import index_geomturbo
 
-def get_row_name(gt_file):
-    in_row_block = re.compile(r'(\s*NI_BEGIN\s*NIROW)')
-    in_blade_block = re.compile(r'(\s*NI_BEGIN\s*NIBLADE\s*)')
-    end_block = re.compile(r'(\s*NI_END\s*NIROW)')
-    name_block = re.compile(r'(\s*NAME\s*)')
-
-    with open(gt_file, 'r') as f:
-        start_row_block = False
-        lines = iter(f.readlines())
-        row_name = ''
-        for line in lines:
-            if re.search(in_blade_block, line):
-                start_row_block = False
-            elif re.search(in_row_block, line):
-                start_row_block = True
-            elif start_row_block and re.search(name_block, line):
-                row_name = line.split()[1]
 
-        return gt_file, row_name
+def get_row_name(gt_file):
+    return gt_file, index_geomturbo(gt_file).row_name
 
 
 if __name__ == '__main__':
@@ -78,7 +62,7 @@ if __name__ == '__main__':
     try:
         if not os.path.exists(autogrid_prj):
             os.mkdir(autogrid_prj)
-            autogrid_prj = os.path.join(autogrid_prj, autogrid_file_name)
+        autogrid_prj = os.path.join(autogrid_prj, autogrid_file_name)
     except Exception as ex:
         logger.error(
             'While creating directory {dir} an error occurred {ex}'.format(dir=autogrid_prj, ex=ex)
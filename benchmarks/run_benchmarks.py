@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate_rows  # noqa: E402
+from parse_geom import parse_geomturbo, load_sections  # noqa: E402
+from geom_index import index_geomturbo  # noqa: E402
+from geom_cache import GeometryCache  # noqa: E402
+from interpolation import BladeCurves  # noqa: E402
+from intersection import intersect_radius  # noqa: E402
+from main import get_coordinates  # noqa: E402
+from injection import get_section_radius  # noqa: E402
+from cfx_export import write_injection_csv, write_injection_files  # noqa: E402
+
+
+def measure(name, func, repeat, **params):
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    result = {
+        'name': name, 'params': params, 'repeat': repeat,
+        'min': min(times), 'median': statistics.median(times),
+        'mean': statistics.fmean(times), 'max': max(times)
+    }
+    print(f'{name:<32}{result["median"] * 1000:>12.3f} ms')
+    return result
+
+
+def run(args, work_dir):
+    rows = generate_rows(os.path.join(work_dir, 'geomturbo'), args.rows, args.sections, args.points)
+    gt_files = [gt_file for _, gt_file in rows]
+    size = {'rows': args.rows, 'sections': args.sections, 'points': args.points}
+    results = []
+
+    # Parsing
+    results.append(measure(
+        'parse_geomturbo', lambda: [parse_geomturbo(f) for f in gt_files], args.repeat, **size
+    ))
+    results.append(measure(
+        'index_geomturbo', lambda: [index_geomturbo(f) for f in gt_files], args.repeat, **size
+    ))
+    results.append(measure(
+        'load_sections_one_side',
+        lambda: [load_sections(f, sides={'pressure'}) for f in gt_files], args.repeat, **size
+    ))
+    cache = GeometryCache(os.path.join(work_dir, 'cache'))
+    for gt_file in gt_files:
+        cache.load(gt_file)
+    results.append(measure(
+        'geometry_cache_warm_load', lambda: [cache.load(f) for f in gt_files], args.repeat, **size
+    ))
+
+    # Section registration and bracketing
+    blade = rows[0][0]
+    airfoil = parse_geomturbo(gt_files[0])
+    with BladeCurves.scoped_registry():
+        for side, sections in airfoil.items():
+            for section, pts in sections.items():
+                BladeCurves(points=pts, radius=get_section_radius(pts), side=side,
+                            blade=blade, section=section)
+
+        radii = np.linspace(395.0, 485.0, args.queries)
+        results.append(measure(
+            'get_obj', lambda: [BladeCurves.get_obj(blade=blade, side='pressure', radius=r)
+                                for r in radii],
+            args.repeat, queries=args.queries, **size
+        ))
+
+        # Radius intersection
+        lower, upper = BladeCurves.get_obj(blade=blade, side='pressure', radius=437.0)
+        results.append(measure(
+            'intersect_radius', lambda: intersect_radius(lower.points, upper.points, 437.0),
+            args.repeat, **size
+        ))
+        results.append(measure(
+            'get_coordinates',
+            lambda: [get_coordinates(p1, p2, 437.0) for p1, p2 in zip(lower.points, upper.points)],
+            args.repeat, **size
+        ))
+
+        # Arc-length evaluation
+        crossing = intersect_radius(lower.points, upper.points, 437.0)
+        injection = BladeCurves(points=crossing.points, radius=437.0, registry=None)
+        injection.set_piece_lengths()
+        s = np.linspace(0.0, 1.0, args.holes)
+        results.append(measure(
+            'get_abs_coordinates_batch', lambda: injection.get_abs_coordinates(s),
+            args.repeat, holes=args.holes, **size
+        ))
+        results.append(measure(
+            'get_abs_coordinates_scalar', lambda: [injection.get_abs_coordinates(si) for si in s],
+            args.repeat, holes=args.holes, **size
+        ))
+
+        # CSV writing
+        points = injection.get_abs_coordinates(s)
+        parameters = [('Temperature', '851', 'K'), ('Mass', '0.0715', 'kg s-1')]
+        job = {
+            'injection_file': os.path.join(work_dir, 'injection.csv'), 'injection_name': 'Injection',
+            'parameters': parameters, 'points': points, 'directions': (0, 0, 1), 'diameter': 0.002
+        }
+        results.append(measure(
+            'write_injection_csv', lambda: write_injection_csv(**job), args.repeat, holes=args.holes
+        ))
+        jobs = [dict(job, injection_file=os.path.join(work_dir, f'injection_{n}.csv'))
+                for n in range(args.files)]
+        results.append(measure(
+            'write_injection_files', lambda: write_injection_files(jobs), args.repeat,
+            holes=args.holes, files=args.files
+        ))
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the cooling pipeline stages on synthetic geometry')
+    parser.add_argument('--rows', type=int, default=2)
+    parser.add_argument('--sections', type=int, default=51)
+    parser.add_argument('--points', type=int, default=201)
+    parser.add_argument('--queries', type=int, default=1000, help='radii bracketed by get_obj')
+    parser.add_argument('--holes', type=int, default=1000, help='s values per section')
+    parser.add_argument('--files', type=int, default=16, help='injection files written concurrently')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='benchmark_results.json')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='cooling_bench_')
+    try:
+        results = run(args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
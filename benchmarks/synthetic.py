@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import os
+import argparse
+
+import numpy as np
+
+
+def airfoil_sides(radius: float, num_points: int, chord: float = 30.0,
+                  stagger: float = 0.6, thickness: float = 0.12):
+    """
+    A cambered airfoil wrapped onto the cylinder of the given radius
+
+    :returns: tuple of suction and pressure side points, numpy.ndarray (num_points x 3)
+    """
+    t = 0.5 * (1.0 - np.cos(np.linspace(0.0, np.pi, num_points)))
+    camber = 0.08 * chord * np.sin(np.pi * t)
+    half_thickness = 0.5 * thickness * chord * (
+        2.969 * np.sqrt(t) - 1.26 * t - 3.516 * t ** 2 + 2.843 * t ** 3 - 1.036 * t ** 4
+    )
+    sides = []
+    for sign in (1.0, -1.0):
+        axial = chord * t * np.cos(stagger)
+        tangential = chord * t * np.sin(stagger) + camber + sign * half_thickness
+        theta = tangential / radius
+        sides.append(np.column_stack((radius * np.sin(theta), radius * np.cos(theta), axial)))
+    return sides
+
+
+def write_geomturbo(gt_file, row_name: str, num_sections: int, num_points: int,
+                    hub_radius: float = 400.0, tip_radius: float = 480.0):
+    """
+    Writes a geomTurbo file with one NIROW, one NIBLADEGEOMETRY block and
+    num_sections sections of num_points points on each side
+    """
+    radii = np.linspace(hub_radius, tip_radius, num_sections)
+    sections = [airfoil_sides(r, num_points) for r in radii]
+
+    with open(gt_file, 'w') as f:
+        f.write('GEOMETRY TURBO\nVERSION 5.5\nTOLERANCE 1e-06\n')
+        f.write(f'NI_BEGIN NIROW\nNAME {row_name}\nTYPE normal\nPERIODICITY 40\n')
+        f.write('NI_BEGIN NIBLADE\nNAME Main Blade\nNI_BEGIN NIBLADEGEOMETRY\n')
+        f.write('TYPE GEOMTURBO\nGEOMETRY_MODIFIED 0\nGEOMETRY TURBO VERSION 5\n')
+        for k, side in enumerate(('suction', 'pressure')):
+            f.write(f'{side}\nSECTIONAL\n{num_sections}\n')
+            for j, section in enumerate(sections, 1):
+                f.write(f'# section {j}\nXYZ\n{num_points}\n')
+                np.savetxt(f, section[k], fmt='%.9f')
+        f.write('NI_END NIBLADEGEOMETRY\nNI_END NIBLADE\nNI_END NIROW\nNI_END GEOMTURBO\n')
+
+
+def generate_rows(directory, num_rows: int, num_sections: int, num_points: int):
+    """
+    Writes num_rows geomTurbo files alternating guide vanes and rotor blades,
+    named so that main.py recognizes their blades (gv1, rb1, gv2, ...)
+
+    :returns: list of (row name, file path)
+    """
+    os.makedirs(directory, exist_ok=True)
+    rows = []
+    for n in range(num_rows):
+        row_name = f'{"gv" if n % 2 == 0 else "rb"}{n // 2 + 1}'
+        gt_file = os.path.join(directory, f'hpt_{row_name}.geomTurbo')
+        write_geomturbo(gt_file, row_name, num_sections, num_points)
+        rows.append((row_name, gt_file))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic geomTurbo files')
+    parser.add_argument('directory')
+    parser.add_argument('--rows', type=int, default=2)
+    parser.add_argument('--sections', type=int, default=51)
+    parser.add_argument('--points', type=int, default=201)
+    args = parser.parse_args()
+    for name, path in generate_rows(args.directory, args.rows, args.sections, args.points):
+        print(f'{name}: {path}')
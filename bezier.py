@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+from functools import lru_cache
+from math import comb
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def binomial(n: int, i: int):
+    return comb(n, i)
+
+
+@lru_cache(maxsize=64)
+def binomial_row(n: int):
+    """
+    :returns: read-only numpy.ndarray of binomial coefficients C(n, i), i = 0..n
+    """
+    row = np.array([binomial(n, i) for i in range(n + 1)], dtype=np.float64)
+    row.setflags(write=False)
+    return row
+
+
+@lru_cache(maxsize=16)
+def gauss_legendre(order: int):
+    nodes, weights = np.polynomial.legendre.leggauss(order)
+    nodes.setflags(write=False)
+    weights.setflags(write=False)
+    return nodes, weights
+
+
+def bernstein_matrix(n: int, t):
+    """
+    Evaluates all Bernstein basis polynomials of degree n at once
+
+    :param: n int: a degree of the basis
+    :param: t array-like (M,): parameter values
+    :returns: numpy.ndarray (M x n + 1), element [m, i] is B_{n,i}(t_m)
+    """
+    t = np.asarray(t, dtype=np.float64).reshape(-1, 1)
+    i = np.arange(n + 1)
+    return binomial_row(n) * t ** i * (1.0 - t) ** (n - i)
+
+
+def de_casteljau(control_points, t):
+    """
+    Evaluates a Bezier curve by the de Casteljau algorithm for all parameter
+    values at once. Slower than the Bernstein matrix but stable for high degrees.
+
+    :param: control_points array-like (n + 1 x d): control points
+    :param: t array-like (M,): parameter values
+    :returns: numpy.ndarray (M x d) of curve points
+    """
+    control = np.asarray(control_points, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64).reshape(-1, 1, 1)
+    points = np.broadcast_to(control, (t.shape[0],) + control.shape).copy()
+    for k in range(len(control) - 1, 0, -1):
+        points[:, :k] = (1.0 - t) * points[:, :k] + t * points[:, 1:k + 1]
+    return points[:, 0]
+
+
+def bezier_points(control_points, t, method='bernstein'):
+    """
+    :param: method str: 'bernstein' for the basis matrix product or
+    'de_casteljau' for the recursive evaluation
+    :returns: numpy.ndarray (M x d) of curve points
+    """
+    control = np.asarray(control_points, dtype=np.float64)
+    if method == 'de_casteljau':
+        return de_casteljau(control, t)
+    elif method == 'bernstein':
+        return bernstein_matrix(len(control) - 1, t) @ control
+    raise ValueError(f'Unknown Bezier evaluation method {method}')
+
+
+def bezier_derivative(control_points, t):
+    """
+    :returns: numpy.ndarray (M x d) of curve tangents dB/dt
+    """
+    control = np.asarray(control_points, dtype=np.float64)
+    n = len(control) - 1
+    if n == 0:
+        return np.zeros((np.size(t), control.shape[1]))
+    return n * (bernstein_matrix(n - 1, t) @ np.diff(control, axis=0))
+
+
+def segment_lengths(control_points, bounds, order=8):
+    """
+    Arc lengths of a Bezier curve between consecutive parameter bounds by
+    Gauss-Legendre quadrature of |dB/dt| on each interval
+
+    :returns: numpy.ndarray (len(bounds) - 1,)
+    """
+    bounds = np.asarray(bounds, dtype=np.float64)
+    nodes, weights = gauss_legendre(order)
+    half = 0.5 * np.diff(bounds)
+    mid = 0.5 * (bounds[:-1] + bounds[1:])
+    t = (mid[:, None] + half[:, None] * nodes).reshape(-1)
+    speed = np.linalg.norm(bezier_derivative(control_points, t), axis=1).reshape(-1, order)
+    return half * (speed @ weights)
+
+
+def arc_length(control_points, t0=0.0, t1=1.0, segments=16, order=8):
+    return float(np.sum(segment_lengths(control_points, np.linspace(t0, t1, segments + 1), order)))
+
+
+class BezierCurve:
+
+    """
+    A Bezier curve defined by its control points
+
+    Attributes
+    __________
+    :parameter: control_points numpy.ndarray (n + 1 x d): control points
+    :parameter: degree int: a degree of the curve
+
+    Methods
+    _______
+    evaluate(t, method='bernstein'):
+        :returns: numpy.ndarray (M x d) of curve points
+    derivative(t):
+        :returns: numpy.ndarray (M x d) of tangents
+    length(t0=0.0, t1=1.0):
+        :returns: float arc length between t0 and t1
+    arc_length_table(num_points=1001):
+        :returns: tuple of parameter values and cumulative arc lengths
+    sample(num_points, uniform_length=True):
+        :returns: numpy.ndarray (num_points x d) of points spaced evenly
+        by arc length or by parameter
+    """
+
+    def __init__(self, control_points):
+        self.control_points = np.asarray(control_points, dtype=np.float64)
+        if self.control_points.ndim != 2 or len(self.control_points) < 2:
+            raise ValueError('A Bezier curve needs at least two control points')
+
+    @property
+    def degree(self):
+        return len(self.control_points) - 1
+
+    def evaluate(self, t, method='bernstein'):
+        return bezier_points(self.control_points, t, method)
+
+    def derivative(self, t):
+        return bezier_derivative(self.control_points, t)
+
+    def length(self, t0=0.0, t1=1.0):
+        return arc_length(self.control_points, t0, t1)
+
+    def arc_length_table(self, num_points=1001):
+        t = np.linspace(0.0, 1.0, num_points)
+        lengths = np.concatenate(([0.0], np.cumsum(segment_lengths(self.control_points, t))))
+        return t, lengths
+
+    def sample(self, num_points, uniform_length=True):
+        if not uniform_length:
+            return self.evaluate(np.linspace(0.0, 1.0, num_points))
+        t, lengths = self.arc_length_table(max(4 * num_points, 1001))
+        targets = np.linspace(0.0, lengths[-1], num_points)
+        return self.evaluate(np.interp(targets, lengths, t))
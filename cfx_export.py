@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+DATA_HEADER = 'x [ m ], y[ m ], z [ m ], Direction u [], Direction v [], Direction w []\n'
+
+
+def format_header(injection_name, parameters):
+    """
+    :param: injection_name str: a name of the injection
+    :param: parameters list: (name, value, unit) of the injection parameters
+    :returns: str the [Name], [Parameters], [Spatial Fields] and [Data] header
+    """
+    lines = ['[Name]\n', f'{injection_name}\n\n', '[Parameters]\n']
+    lines.extend(f'{key_parameter} = {val} [{key_unit}]\n' for key_parameter, val, key_unit in parameters)
+    lines.extend(['\n\n', '[Spatial Fields]\n', 'x, y, z\n\n', '[Data]\n', DATA_HEADER])
+    return ''.join(lines)
+
+
+def format_data(points, directions, diameter, coef=1000):
+    """
+    Formats hole rows 'x, y, z, u, v, w, diameter' of all holes at once
+
+    :param: points array-like (M x 3): hole coordinates in model units
+    :param: directions tuple or array-like (M x 3): one direction (u, v, w)
+        shared by all holes or a direction per hole
+    :param: diameter float: a hole diameter
+    :param: coef float: model units per meter
+    :returns: str
+    """
+    scaled = (np.asarray(points, dtype=np.float64).reshape(-1, 3) / coef).tolist()
+    if isinstance(directions, tuple):
+        u, v, w = directions
+        suffix = f'{u}, {v}, {w}, {diameter}\n'
+        return ''.join([f'{x}, {y}, {z}, {suffix}' for x, y, z in scaled])
+    rows = np.asarray(directions, dtype=np.float64).reshape(-1, 3).tolist()
+    return ''.join([f'{x}, {y}, {z}, {u}, {v}, {w}, {diameter}\n'
+                    for (x, y, z), (u, v, w) in zip(scaled, rows)])
+
+
+def write_injection_csv(injection_file, injection_name, parameters, points, directions,
+                        diameter, coef=1000):
+    """
+    Writes an Ansys CFX injection region file with all holes formatted at once
+
+    :param: injection_file str: a path of the csv file
+    :returns: int a number of written holes
+    """
+    return write_injection_stream(
+        injection_file, injection_name, parameters, [(points, directions)], diameter, coef
+    )
+
+
+def write_injection_stream(injection_file, injection_name, parameters, chunks, diameter, coef=1000):
+    """
+    Writes an Ansys CFX injection region file chunk by chunk, so only one
+    chunk of holes is held in memory at a time
+
+    :param: chunks iterable: (points, directions) as accepted by format_data
+    :returns: int a number of written holes
+    """
+    holes = 0
+    with open(injection_file, 'w', newline='') as f:
+        f.write(format_header(injection_name, parameters))
+        for points, directions in chunks:
+            f.write(format_data(points, directions, diameter, coef))
+            holes += len(points)
+    return holes
+
+
+def write_injection_files(jobs, workers=None):
+    """
+    Writes independent injection files concurrently
+
+    :param: jobs list: dicts of write_injection_csv keyword arguments
+    :param: workers int: a number of writer threads, one per file up to 32 if None
+    :returns: list of numbers of written holes in the order of jobs
+    """
+    if not jobs:
+        return []
+    if workers is None:
+        workers = min(32, len(jobs))
+    if workers <= 1:
+        return [write_injection_csv(**job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda job: write_injection_csv(**job), jobs))
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import argparse
+
+import numpy as np
+
+
+def segment_distances(points, start, end):
+    """
+    :param: points numpy.ndarray (... x 3)
+    :param: start, end numpy.ndarray: segment ends broadcast against points
+    :returns: numpy.ndarray (...) of distances from points to the segments
+    """
+    direction = end - start
+    squared = np.einsum('...i,...i->...', direction, direction)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(squared > 0.0, np.einsum('...i,...i->...', points - start, direction) / squared, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm(points - (start + t[..., None] * direction), axis=-1)
+
+
+def douglas_peucker(points, tolerance):
+    """
+    :param: points numpy.ndarray (N x 3) of a polyline or (K x N x 3) of K
+        polylines reduced to common indices, each within the tolerance
+    :param: tolerance float: a maximum chordal deviation
+    :returns: numpy.ndarray of sorted indices of the kept points, the ends always kept
+    """
+    points = np.asarray(points, dtype=np.float64)
+    stacked = points if points.ndim == 3 else points[None]
+    num_points = stacked.shape[1]
+    keep = np.zeros(num_points, dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, num_points - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = segment_distances(
+            stacked[:, first + 1:last], stacked[:, first, None], stacked[:, last, None]
+        ).max(axis=0)
+        k = int(distances.argmax())
+        if distances[k] > tolerance:
+            index = first + 1 + k
+            keep[index] = True
+            stack.extend([(first, index), (index, last)])
+    return np.flatnonzero(keep)
+
+
+def polyline_deviation(points, indices):
+    """
+    :returns: float the maximum distance of the points to the polyline through points[indices]
+    """
+    points = np.asarray(points, dtype=np.float64)
+    # A segment of the reduced polyline embracing each point
+    segment = np.clip(np.searchsorted(indices, np.arange(len(points)), side='right') - 1,
+                      0, len(indices) - 2)
+    distances = segment_distances(points, points[indices[segment]], points[indices[segment + 1]])
+    return float(distances.max()) if len(distances) else 0.0
+
+
+def decimate_side(sections, tolerance):
+    """
+    Reduces the sections of a blade side by Douglas-Peucker to a common
+    index set, splitting where any section deviates most, so that points of
+    neighbouring sections stay paired by index
+
+    :param: sections dict: {section: numpy.ndarray (N x 3)}
+    :returns: tuple of dict {section: numpy.ndarray (K x 3)} and dict report of
+        points, kept points and the maximum deviation; sections of different
+        point counts are kept as they are
+    """
+    arrays = {name: np.asarray(pts, dtype=np.float64) for name, pts in sections.items()}
+    num_points = {len(pts) for pts in arrays.values()}
+    total = sum(len(pts) for pts in arrays.values())
+    if len(num_points) != 1 or min(num_points) < 3:
+        return arrays, {'points': total, 'kept': total, 'max_deviation': 0.0}
+
+    indices = douglas_peucker(np.stack(list(arrays.values())), tolerance)
+    reduced = {name: np.ascontiguousarray(pts[indices]) for name, pts in arrays.items()}
+    deviation = max(polyline_deviation(pts, indices) for pts in arrays.values())
+    return reduced, {'points': total, 'kept': len(indices) * len(arrays), 'max_deviation': deviation}
+
+
+def decimate_airfoil(airfoil, tolerance):
+    """
+    :param: airfoil dict: {side: {section: points}}
+    :param: tolerance float: a maximum chordal deviation in model units
+    :returns: tuple of the reduced airfoil and dict {side: report of decimate_side}
+    """
+    reduced, report = {}, {}
+    for side, sections in airfoil.items():
+        reduced[side], report[side] = decimate_side(sections, tolerance)
+    return reduced, report
+
+
+def summarize(reports):
+    """
+    :param: reports iterable: reports of decimate_airfoil
+    :returns: dict of total points, kept points and the maximum deviation
+    """
+    sides = [side for report in reports for side in report.values()]
+    return {
+        'points': sum(side['points'] for side in sides),
+        'kept': sum(side['kept'] for side in sides),
+        'max_deviation': max((side['max_deviation'] for side in sides), default=0.0)
+    }
+
+
+def hole_deviation(full, reduced):
+    """
+    :param: full, reduced dict: {injection number: numpy.ndarray (M x 3)} of hole coordinates
+    :returns: float the maximum distance between the same holes
+    """
+    return max((float(np.linalg.norm(full[i] - reduced[i], axis=1).max()) for i in full if len(full[i])),
+               default=0.0)
+
+
+if __name__ == '__main__':
+
+    # Imported here as doe decimates with this module
+    from doe import GeometryModel
+
+    parser = argparse.ArgumentParser(
+        description='Compare hole placement on decimated sections with full resolution'
+    )
+    parser.add_argument('tolerance', type=float, help='maximum chordal deviation in model units')
+    parser.add_argument('--geomturbo-dir', default=os.path.join('.', 'geomturbo'),
+                        help='directory of geomTurbo files')
+    parser.add_argument('--injections', default=os.path.join('.', 'injections.cfg'),
+                        help='injection configuration file')
+    args = parser.parse_args()
+
+    results = {}
+    for tolerance in (None, args.tolerance):
+        model = GeometryModel(args.geomturbo_dir, decimate=tolerance, section_cache=False)
+        start = time.perf_counter()
+        holes = model.evaluate(args.injections).holes
+        results[tolerance] = (model, holes, time.perf_counter() - start)
+
+    model, holes, elapsed = results[args.tolerance]
+    summary = summarize(model.decimation.values())
+    print(f'Points: {summary["points"]} -> {summary["kept"]}')
+    print(f'Maximum section deviation: {summary["max_deviation"]:.6g}')
+    print(f'Maximum hole deviation: {hole_deviation(results[None][1], holes):.6g}')
+    print(f'Placement time: {results[None][2]:.4f} s -> {elapsed:.4f} s')
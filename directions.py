@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+OPPOSITE_SEARCH_POINTS = 128
+OUTWARD_SAMPLES = np.linspace(0.2, 0.8, 7)
+
+
+def _unit(vectors):
+    norm = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norm > 0.0, norm, 1.0)
+
+
+def _normals(surface, s, r):
+    dp_ds, dp_dr = surface.tangents(s, r)
+    return dp_ds, _unit(np.cross(dp_ds, dp_dr))
+
+
+def _outward_sign(surface, opposite):
+    # Normals of a smooth side share their orientation, which is decided by
+    # most of the points away from the edges, where both sides meet: a point
+    # moved along an outward normal goes away from the opposite side
+    s = np.tile(OUTWARD_SAMPLES, len(surface.radii))
+    r = np.repeat(surface.radii, len(OUTWARD_SAMPLES))
+    points = surface.place(s, r)
+    normals = _normals(surface, s, r)[1]
+
+    grid = opposite.grid[:, ::max(1, opposite.grid.shape[1] // OPPOSITE_SEARCH_POINTS)]
+    k = np.abs(opposite.radii[None, :] - r[:, None]).argmin(axis=1)
+    offsets = grid[k] - points[:, None, :]
+    nearest = grid[k, np.einsum('msi,msi->ms', offsets, offsets).argmin(axis=1)]
+    return np.sign(np.sum(np.sign(np.einsum('mi,mi->m', normals, points - nearest)))) or 1.0
+
+
+def surface_frames(surface, s, r, opposite=None):
+    """
+    Local frames of a blade surface at hole positions
+
+    The normal is the cross product of the tangents along s and along the
+    radius. With the surface of the opposite blade side given, normals are
+    turned away from it, that is out of the blade; otherwise their sign
+    follows the point order of the sections. The orientation is chosen
+    once per side, so holes at the edges are oriented as the rest.
+
+    :param: surface BladeSurface: a blade side
+    :param: s array-like: normalized arc lengths of the holes
+    :param: r array-like: radii of the holes, broadcast against s
+    :param: opposite BladeSurface: the other side of the blade
+    :returns: tuple of numpy.ndarray (M x 3) of
+        points of the holes,
+        unit tangents along s (the streamwise direction),
+        unit normals
+    """
+    points = surface.place(s, r)
+    dp_ds, normals = _normals(surface, s, r)
+    tangents = _unit(dp_ds)
+
+    if opposite is not None and _outward_sign(surface, opposite) < 0.0:
+        normals *= -1.0
+
+    return points, tangents, normals
+
+
+def tilt(tangents, normals, inclination, compound=0.0):
+    """
+    Hole axes tilted from the surface by compound angles
+
+    An axis makes the inclination angle with the surface and, projected on
+    the surface, the compound angle with the streamwise tangent:
+        d = cos(a) * (cos(b) * t + sin(b) * (n x t)) + sin(a) * n
+    so an inclination of 90 degrees gives the normal itself.
+
+    :param: tangents numpy.ndarray (M x 3): unit streamwise tangents
+    :param: normals numpy.ndarray (M x 3): unit normals
+    :param: inclination float or array-like (M,): angles to the surface in degrees
+    :param: compound float or array-like (M,): angles to the streamwise direction in degrees
+    :returns: numpy.ndarray (M x 3) of unit directions
+    """
+    # The tangent is made orthogonal to the normal before building the frame
+    t = _unit(tangents - np.einsum('mi,mi->m', tangents, normals)[:, None] * normals)
+    b = np.cross(normals, t)
+    a = np.radians(np.asarray(inclination, dtype=np.float64)).reshape(-1, 1)
+    c = np.radians(np.asarray(compound, dtype=np.float64)).reshape(-1, 1)
+    return _unit(np.cos(a) * (np.cos(c) * t + np.sin(c) * b) + np.sin(a) * normals)
+
+
+def hole_directions(surface, s, r, inclination, compound=0.0, opposite=None):
+    """
+    :returns: numpy.ndarray (M x 3) of unit hole directions at pairs (s, r),
+        see surface_frames and tilt
+    """
+    points, tangents, normals = surface_frames(surface, s, r, opposite)
+    return tilt(tangents, normals, inclination, compound)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from registry import SectionRegistry
+from section_cache import SectionCache
+from decimate import decimate_airfoil
+from geom_cache import GeometryCache
+from geom_loader import load_geometry, load_geometry_parallel
+from cfx_export import write_injection_files
+from injection import (
+    COEF, read_injection_config, get_blade_name, register_sections,
+    build_injection_sections, get_hole_positions, place_holes, get_export_job,
+    has_hole_angles, build_surfaces, get_hole_directions
+)
+
+
+VariantResult = namedtuple('VariantResult', ['holes', 'files'])
+
+
+class GeometryModel:
+
+    """
+    Blade geometry loaded once to evaluate many injection configurations
+
+    Sections are kept in a registry of the model, not in the class registry
+    of BladeCurves, and injection sections of a variant are never registered,
+    so variants evaluated concurrently share nothing mutable.
+
+    Attributes
+    __________
+    :parameter: geomturbo str or list: a geomTurbo directory or a list of geomTurbo files
+    :parameter: cache_dir str: a geometry cache directory, no cache if None
+    :parameter: workers int: a number of processes parsing geomTurbo files
+    :parameter: section_cache SectionCache: injection sections reused across
+        evaluations, a default cache if None, no cache if False
+    :parameter: decimate float: a chordal tolerance the sections are reduced
+        to, full resolution if None
+    :parameter: decimation dict: {blade: report of decimate.decimate_airfoil}
+    :parameter: registry SectionRegistry: sections of all blades
+    :parameter: blade_files dict: {blade: geomTurbo file}
+
+    Methods
+    _______
+    surfaces(blade, side):
+        :returns: tuple of BladeSurface of a blade side and of the other side
+    evaluate(injections, output_dir=None):
+        :returns: VariantResult of one injection configuration
+    evaluate_batch(variants, output_root=None, workers=None):
+        :returns: list of VariantResult in the order of variants
+    close():
+        releases the shared memory of the geometry loaded by worker processes
+    """
+
+    def __init__(self, geomturbo=os.path.join('.', 'geomturbo'), cache_dir=None, workers=1,
+                 section_cache=None, decimate=None):
+        if isinstance(geomturbo, str):
+            gt_files = [os.path.join(geomturbo, f) for f in sorted(os.listdir(geomturbo))
+                        if os.path.splitext(f)[1] == '.geomTurbo']
+        else:
+            gt_files = list(geomturbo)
+
+        self.blade_files = {get_blade_name(gtf): gtf for gtf in gt_files}
+        self.registry = SectionRegistry()
+        if section_cache is None:
+            section_cache = SectionCache()
+        self.section_cache = section_cache if section_cache is not False else None
+        self.__shared_geometry = None
+        self.__surfaces = {}
+        self.__surfaces_lock = threading.Lock()
+
+        if workers > 1:
+            self.__shared_geometry = load_geometry_parallel(
+                {gtf: None for gtf in gt_files}, workers=workers, cache_dir=cache_dir
+            )
+            airfoils = self.__shared_geometry.airfoils
+        else:
+            geometry_cache = GeometryCache(cache_dir) if cache_dir else None
+            airfoils = {gtf: load_geometry(gtf, geometry_cache=geometry_cache) for gtf in gt_files}
+
+        self.decimation = {}
+        for blade, gtf in self.blade_files.items():
+            airfoil = airfoils[gtf]
+            if decimate is not None:
+                airfoil, self.decimation[blade] = decimate_airfoil(airfoil, decimate)
+            register_sections(airfoil, blade, registry=self.registry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.__shared_geometry is not None:
+            self.__shared_geometry.close()
+            self.__shared_geometry = None
+
+    def surfaces(self, blade, side):
+        """
+        :returns: tuple of BladeSurface of a blade side and of the other side,
+            built on first use
+        """
+        with self.__surfaces_lock:
+            return build_surfaces(blade, side, self.registry, self.__surfaces)
+
+    def evaluate(self, injections, output_dir=None, coef=COEF):
+        """
+        :param: injections str or list: an injection configuration file or its rows,
+            dicts with the same keys as the columns of injections.cfg
+        :param: output_dir str: a directory the Ansys CFX injection files are
+            written to, no files are written if None
+        :param: coef float: model units per meter
+        :returns: VariantResult of
+            holes dict: {injection number: numpy.ndarray (M x 3) of hole coordinates}
+            files dict: {injection number: a path of the written injection file}
+        :raises: UnreachableRadiusError, ValueError, KeyError as main.py
+        """
+        if isinstance(injections, str):
+            injections = read_injection_config(injections)
+
+        holes, jobs = {}, {}
+        for i, inj in enumerate(injections, 1):
+            injection_sections = build_injection_sections(
+                inj, i, registry=self.registry, injection_registry=None,
+                section_cache=self.section_cache
+            )
+            s, d = get_hole_positions(inj)
+            holes[i] = place_holes(injection_sections, s)
+            if output_dir is not None:
+                directions = None
+                if has_hole_angles(inj):
+                    directions = get_hole_directions(inj, s, *self.surfaces(inj['blade'], inj['side']))
+                jobs[i] = get_export_job(inj, i, holes[i], d, output_dir, coef, directions)
+
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            write_injection_files(list(jobs.values()))
+        return VariantResult(holes, {i: job['injection_file'] for i, job in jobs.items()})
+
+    def evaluate_batch(self, variants, output_root=None, workers=None, coef=COEF):
+        """
+        :param: variants list: injection configurations as accepted by evaluate
+        :param: output_root str: files of the n-th variant are written to
+            output_root/variant_n, no files are written if None
+        :param: workers int: a number of threads evaluating variants, os.cpu_count() based if None
+        :returns: list of VariantResult in the order of variants
+        """
+        variants = list(variants)
+        output_dirs = [
+            os.path.join(output_root, f'variant_{n}') if output_root is not None else None
+            for n in range(1, len(variants) + 1)
+        ]
+        if workers == 1:
+            return [self.evaluate(v, d, coef) for v, d in zip(variants, output_dirs)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda args: self.evaluate(*args, coef),
+                                     zip(variants, output_dirs)))
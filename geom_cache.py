@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from parse_geom import parse_geomturbo
+
+
+CACHE_VERSION = 1
+
+
+def file_hash(file_name, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_name, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def section_layout(airfoil):
+    """
+    :returns: tuple of a layout [[side, section, start, stop], ...] of the
+    sections packed into one array and a total number of points. Sections
+    which could not be decoded get None bounds.
+    """
+    layout, start = [], 0
+    for side, sections in airfoil.items():
+        for section, pts in sections.items():
+            if isinstance(pts, np.ndarray):
+                layout.append([side, section, start, start + len(pts)])
+                start += len(pts)
+            else:
+                layout.append([side, section, None, None])
+    return layout, start
+
+
+def pack_sections(airfoil, layout, out):
+    for side, section, start, stop in layout:
+        if start is not None:
+            out[start:stop] = airfoil[side][section]
+    return out
+
+
+def unpack_sections(points, layout):
+    airfoil = {}
+    for side, section, start, stop in layout:
+        sections = airfoil.setdefault(side, {})
+        sections[section] = [] if start is None else points[start:stop]
+    return airfoil
+
+
+class GeometryCache:
+
+    """
+    A persistent on-disk cache of parsed geomTurbo geometry
+
+    Each geomTurbo file is stored as one entry of two files: <key>.npy holds
+    the points of all sections as a single contiguous float64 (M x 3) array
+    which is memory-mapped on load, <key>.json holds the source file
+    fingerprint and the side/section layout of that array.
+
+    An entry is valid while the source file size and modification time are
+    unchanged. If they differ the content hash decides: an equal hash only
+    refreshes the fingerprint, otherwise the entry is evicted and the file is
+    parsed again.
+
+    Attributes
+    __________
+    :parameter: cache_dir str: a directory where entries are stored
+
+    Methods
+    _______
+    load(gt_file):
+        :returns: dict {side: {section: points}} from the cache or the parser
+    prune():
+        :returns: int a number of evicted entries whose source has gone
+    clear():
+        removes all cache entries
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_paths(self, gt_file):
+        key = hashlib.sha1(os.path.abspath(gt_file).encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return f'{base}.json', f'{base}.npy'
+
+    @staticmethod
+    def _read_meta(meta_file):
+        try:
+            with open(meta_file, 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CACHE_VERSION:
+            return None
+        return meta
+
+    @staticmethod
+    def _write_meta(meta_file, meta):
+        tmp_file = f'{meta_file}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_file, meta_file)
+
+    @staticmethod
+    def _remove(*files):
+        for file_name in files:
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                pass
+
+    def _validate(self, gt_file, meta_file, stat):
+        meta = self._read_meta(meta_file)
+        if meta is None:
+            return None, None
+        if (meta['size'], meta['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+            return meta, meta['hash']
+        content_hash = file_hash(gt_file)
+        if meta['hash'] != content_hash:
+            return None, content_hash
+        meta['size'], meta['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+        self._write_meta(meta_file, meta)
+        return meta, content_hash
+
+    def load(self, gt_file):
+        meta_file, data_file = self._entry_paths(gt_file)
+        stat = os.stat(gt_file)
+        meta, content_hash = self._validate(gt_file, meta_file, stat)
+
+        if meta is not None:
+            try:
+                points = np.load(data_file, mmap_mode='r')
+            except (OSError, ValueError):
+                points = None
+            if points is not None:
+                self.hits += 1
+                return unpack_sections(points, meta['layout'])
+
+        self.misses += 1
+        self._remove(meta_file, data_file)
+        airfoil = parse_geomturbo(gt_file)
+        if content_hash is None:
+            content_hash = file_hash(gt_file)
+        self._store(gt_file, airfoil, stat, content_hash, meta_file, data_file)
+        return airfoil
+
+    def _store(self, gt_file, airfoil, stat, content_hash, meta_file, data_file):
+        layout, num_points = section_layout(airfoil)
+        points = pack_sections(airfoil, layout, np.empty((num_points, 3), dtype=np.float64))
+
+        tmp_file = f'{data_file}.tmp'
+        with open(tmp_file, 'wb') as f:
+            np.save(f, points)
+        os.replace(tmp_file, data_file)
+        self._write_meta(meta_file, {
+            'version': CACHE_VERSION, 'path': os.path.abspath(gt_file),
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'hash': content_hash, 'layout': layout
+        })
+
+    def prune(self):
+        evicted = 0
+        for item in os.listdir(self.cache_dir):
+            base, ext = os.path.splitext(item)
+            if ext != '.json':
+                continue
+            meta_file = os.path.join(self.cache_dir, item)
+            meta = self._read_meta(meta_file)
+            if meta is None or not os.path.isfile(meta['path']):
+                self._remove(meta_file, os.path.join(self.cache_dir, f'{base}.npy'))
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        for item in os.listdir(self.cache_dir):
+            if os.path.splitext(item)[1] in ('.json', '.npy', '.tmp'):
+                self._remove(os.path.join(self.cache_dir, item))
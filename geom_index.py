@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# The module is imported by autogrid.py, which runs inside the igg
+# interpreter, therefore it relies on the standard library only.
+import re
+from collections import namedtuple
+
+
+SectionEntry = namedtuple(
+    'SectionEntry', ['side', 'section', 'offset', 'data_offset', 'data_end', 'num_points']
+)
+
+
+class GeomTurboIndex(object):
+
+    """
+    Byte offsets of the blocks of a geomTurbo file
+
+    Attributes
+    __________
+    :parameter: gt_file str: a path of the indexed file
+    :parameter: rows list: (name, offset) of every NAME line of NIROW blocks
+    :parameter: blade_geometry list: (begin, end) offsets of NIBLADEGEOMETRY blocks
+    :parameter: sides dict: {side: offset} of side headers of the first blade geometry
+    :parameter: sections list: SectionEntry of every section of the first blade geometry
+
+    Methods
+    _______
+    row_name:
+        :returns: str the last NIROW name or an empty string
+    select(sides=None, sections=None):
+        :returns: list of SectionEntry of the given sides and section names
+    """
+
+    def __init__(self, gt_file):
+        self.gt_file = gt_file
+        self.rows = []
+        self.blade_geometry = []
+        self.sides = {}
+        self.sections = []
+
+    @property
+    def row_name(self):
+        return self.rows[-1][0] if self.rows else ''
+
+    def select(self, sides=None, sections=None):
+        return [entry for entry in self.sections
+                if (sides is None or entry.side in sides)
+                and (sections is None or entry.section in sections)]
+
+
+ROW_BEGIN_PATTERN = re.compile(r'(\s*NI_BEGIN\s*NIROW)')
+BLADE_BEGIN_PATTERN = re.compile(r'(\s*NI_BEGIN\s*NIBLADE\s*)')
+NAME_PATTERN = re.compile(r'(\s*NAME\s*)')
+GEOMETRY_BEGIN_PATTERN = re.compile(r'(\s)*NI_BEGIN(\s)*NIBLADEGEOMETRY')
+GEOMETRY_END_PATTERN = re.compile(r'(\s)*NI_END(\s)*NIBLADEGEOMETRY')
+SIDE_PATTERN = re.compile(r'(\s)*(suction|pressure)')
+SECTION_PATTERN = re.compile(r'(\s)*(#\s)?section\s*[0-9]+')
+
+
+def index_geomturbo(gt_file):
+    """
+    Reads a geomTurbo file once and records byte offsets of row names,
+    blade geometry blocks, sides and sections. Point blocks are skipped
+    without decoding.
+    """
+    index = GeomTurboIndex(gt_file)
+
+    with open(gt_file, 'rb') as f:
+        offset = 0
+        in_row_block = False
+        in_geometry = False
+        first_geometry_done = False
+        side = None
+        line_iter = iter(f)
+        for raw in line_iter:
+            line_offset = offset
+            offset += len(raw)
+            text = raw.decode('latin-1')
+
+            if GEOMETRY_END_PATTERN.match(text.strip()):
+                if index.blade_geometry and index.blade_geometry[-1][1] is None:
+                    index.blade_geometry[-1] = (index.blade_geometry[-1][0], line_offset)
+                in_geometry = False
+                first_geometry_done = True
+            elif GEOMETRY_BEGIN_PATTERN.match(text.strip()):
+                index.blade_geometry.append((line_offset, None))
+                in_geometry = not first_geometry_done
+                in_row_block = False
+            elif in_geometry:
+                line = text.strip()
+                side_match = SIDE_PATTERN.match(line)
+                section_match = None if side_match else SECTION_PATTERN.match(line)
+                if side_match:
+                    side = side_match.group(0)
+                    index.sides[side] = line_offset
+                elif section_match:
+                    # A truncated file ends the block early, its data_end then
+                    # holds fewer points than num_points and the block fails to decode
+                    header = next(line_iter, b'')
+                    count = next(line_iter, b'')
+                    offset += len(header) + len(count)
+                    data_offset = offset
+                    try:
+                        num_points = int(count)
+                    except ValueError:
+                        num_points = None
+                    for _ in range(num_points or 0):
+                        raw = next(line_iter, b'')
+                        if not raw:
+                            break
+                        offset += len(raw)
+                    index.sections.append(SectionEntry(
+                        side, section_match.group(0), line_offset, data_offset, offset, num_points
+                    ))
+            elif BLADE_BEGIN_PATTERN.search(text):
+                in_row_block = False
+            elif ROW_BEGIN_PATTERN.search(text):
+                in_row_block = True
+            elif in_row_block and NAME_PATTERN.search(text):
+                index.rows.append((text.split()[1], line_offset))
+
+    return index
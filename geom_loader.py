@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from parse_geom import load_sections
+from geom_cache import GeometryCache, section_layout, pack_sections, unpack_sections
+
+
+# A block outlives the worker that created it only where it is a named file
+# of the system; on Windows it is freed with the last open handle, which the
+# worker closes before the parent attaches, so arrays are returned by pickling
+SHARED_MEMORY = os.name == 'posix'
+
+
+def load_geometry(gt_file, sides=None, geometry_cache=None):
+    """
+    Loads the sections of the given sides of a geomTurbo file either from
+    the geometry cache or by selective parsing
+
+    :returns: dict {side: {section: numpy.ndarray (N x 3)}}
+    """
+    if geometry_cache is None:
+        return load_sections(gt_file, sides=sides)
+    airfoil = geometry_cache.load(gt_file)
+    return {side: sections for side, sections in airfoil.items()
+            if sides is None or side in sides}
+
+
+def _load(gt_file, sides, cache_dir):
+    geometry_cache = GeometryCache(cache_dir) if cache_dir else None
+    return load_geometry(gt_file, sides, geometry_cache)
+
+
+def _load_into_shared_memory(gt_file, sides, cache_dir):
+    airfoil = _load(gt_file, sides, cache_dir)
+    layout, num_points = section_layout(airfoil)
+
+    shm = SharedMemory(create=True, size=max(num_points * 3 * 8, 1))
+    try:
+        points = np.ndarray((num_points, 3), dtype=np.float64, buffer=shm.buf)
+        pack_sections(airfoil, layout, points)
+        del points
+    finally:
+        shm.close()
+    return shm.name, num_points, layout
+
+
+class _SharedBlock(SharedMemory):
+
+    # A block cannot be unmapped while section views export its buffer; the
+    # mapping is then released together with the last view
+    def close(self):
+        try:
+            super().close()
+        except BufferError:
+            pass
+
+    def __del__(self):
+        self.close()
+
+
+class SharedGeometry:
+
+    """
+    Geometry of several geomTurbo files loaded by worker processes
+
+    The points of each file live in a shared memory block written by the
+    worker; the parent maps the block and exposes the sections as views
+    without copying. The blocks are unlinked as soon as they are mapped and
+    unmapped by close() or, if some sections are still referenced, together
+    with the last of them. Where SHARED_MEMORY is False the workers return
+    the sections, which are then held as ordinary arrays.
+
+    Attributes
+    __________
+    :parameter: airfoils dict: {gt_file: {side: {section: numpy.ndarray (N x 3)}}}
+
+    Methods
+    _______
+    close():
+        drops the section views and unmaps the shared memory blocks
+    """
+
+    def __init__(self):
+        self.airfoils = {}
+        self.__blocks = []
+
+    def attach(self, gt_file, name, num_points, layout):
+        shm = _SharedBlock(name=name)
+        shm.unlink()
+        self.__blocks.append(shm)
+        points = np.frombuffer(shm.buf, dtype=np.float64, count=num_points * 3)
+        self.airfoils[gt_file] = unpack_sections(points.reshape(num_points, 3), layout)
+
+    def close(self):
+        self.airfoils = {}
+        blocks, self.__blocks = self.__blocks, []
+        for shm in blocks:
+            shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_geometry_parallel(gt_files, workers=None, cache_dir=None):
+    """
+    Parses geomTurbo files in a process pool
+
+    :param: gt_files dict: {gt_file: sides to load or None for all sides}
+    :param: workers int: a number of worker processes, os.cpu_count() if None
+    :param: cache_dir str: a geometry cache directory shared by the workers
+    :returns: SharedGeometry with the same sections as load_geometry, the
+        sections are copied from the workers where SHARED_MEMORY is False
+    """
+    if SHARED_MEMORY:
+        # Workers must register their blocks with the parent's tracker, otherwise
+        # the blocks would be reported as leaked and removed when a worker exits
+        resource_tracker.ensure_running()
+    geometry = SharedGeometry()
+    files = list(gt_files)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _load_into_shared_memory if SHARED_MEMORY else _load, files,
+                [gt_files[f] for f in files], [cache_dir] * len(files)
+            )
+            for gt_file, result in zip(files, results):
+                if SHARED_MEMORY:
+                    geometry.attach(gt_file, *result)
+                else:
+                    geometry.airfoils[gt_file] = result
+    except BaseException:
+        geometry.close()
+        raise
+    return geometry
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import csv
+
+import numpy as np
+
+from interpolation import BladeCurves
+from intersection import intersect_radius
+from surface import BladeSurface
+from directions import hole_directions
+
+
+COEF = 1000  # Units conversion
+UNITS = {
+    'm': 1000, 'dm': 100, 'cm': 10, 'mm': 1
+}
+
+# Patterns to search units, section radius, injection hole diameters and blade names
+UNIT_PATTERN = re.compile(
+    r'(\bm{1,2}\b)|(\bcm\b)|(\bdm\b)|(\bC\b)|(\bK\b)|(\bkg\s+s-1\b)'
+)
+RADIUS_PATTERN = re.compile(r'(\br\s+\[\w+\])')
+HOLE_DIAMETER_PATTERN = re.compile(r'(\bDiameter\s+\[\w+\])')
+BLADE_PATTERN = re.compile(r'(rb_?\d+)|(gv_?\d+)')
+# Optional hole angles, in degrees, to the surface and to the streamwise direction
+INCLINATION_PATTERN = re.compile(r'(\bInclination\s+\[deg\])')
+COMPOUND_PATTERN = re.compile(r'(\bCompound\s+\[deg\])')
+
+
+# Stands for the registry of the BladeCurves class at call time
+CLASS_REGISTRY = object()
+
+
+class UnreachableRadiusError(ValueError):
+    pass
+
+
+def resolve_registry(registry):
+    return BladeCurves.registry if registry is CLASS_REGISTRY else registry
+
+
+def read_injection_config(cfg_file):
+    with open(cfg_file, newline='') as inj_cfg:
+        return list(csv.DictReader(inj_cfg))
+
+
+def get_blade_name(gt_file):
+    return re.search(BLADE_PATTERN, os.path.split(gt_file)[1]).group()
+
+
+def get_section_radius(points):
+    points = np.asarray(points, dtype=np.float64)
+    return float(np.mean(np.hypot(points[:, 0], points[:, 1])))
+
+
+def register_sections(airfoil, blade, sides=None, registry=CLASS_REGISTRY):
+    """
+    Creates BladeCurves of the sections of a parsed geomTurbo file
+
+    :param: airfoil dict: {side: {section: points}}
+    :param: blade str: a name of the blade
+    :param: sides iterable: sides to register, all sides if None
+    :param: registry SectionRegistry: a registry the sections are added to,
+        the class registry by default
+    :returns: list of created BladeCurves
+    """
+    registry = resolve_registry(registry)
+    curves = []
+    for side, section_dict in airfoil.items():
+        if sides is not None and side not in sides:
+            continue
+        for section, pts in section_dict.items():
+            section_name = f'{section.split(" ")[1]}_{section.split(" ")[2]}'
+            curves.append(BladeCurves(
+                points=pts, curve_name=f'{blade}_{side}_{section_name}',
+                radius=get_section_radius(pts),
+                side=side, blade=blade, section=section_name, registry=registry
+            ))
+    return curves
+
+
+def column_unit(key):
+    """
+    :returns: str a unit of an injection configuration column
+    :raises: ValueError if the column has no known unit
+    """
+    unit = re.search(UNIT_PATTERN, key)
+    if unit is None:
+        raise ValueError(f'Column {key!r} of the injection configuration has no known unit')
+    return unit.group()
+
+
+def get_keys(inj):
+    """
+    :returns: tuple of the radius and the hole diameter keys of an injection row
+    """
+    radius_key = [k for k in inj.keys() if re.search(RADIUS_PATTERN, k)][0]
+    hole_diameter_key = [k for k in inj.keys() if re.search(HOLE_DIAMETER_PATTERN, k)][0]
+    return radius_key, hole_diameter_key
+
+
+def get_injection_radii(inj):
+    """
+    :returns: list of injection radii converted to model units
+    :raises: ValueError if the radius column has no length unit or a radius is not a number
+    """
+    radius_key = [k for k in inj.keys() if re.search(RADIUS_PATTERN, k)][0]
+    radius_unit = column_unit(radius_key)
+    if radius_unit not in UNITS:
+        raise ValueError(f'Column {radius_key!r} of the injection configuration is not a length')
+    unit = UNITS[radius_unit]
+    return [float(r) * unit for r in inj[radius_key].split(' ')]
+
+
+def build_injection_section(blade, side, radius, i, registry=CLASS_REGISTRY,
+                            injection_registry=CLASS_REGISTRY):
+    """
+    Builds a section at a radius between the two blade sections embracing it
+
+    :param: i int: a number of the injection
+    :returns: BladeCurves
+    :raises: UnreachableRadiusError if some point pairs cannot reach the radius
+    """
+    registry, injection_registry = resolve_registry(registry), resolve_registry(injection_registry)
+    sections = BladeCurves.get_obj(blade=blade, side=side, radius=radius, registry=registry)
+    num_points = min(len(sections[0].points), len(sections[1].points))
+    crossing = intersect_radius(
+        sections[0].points[:num_points], sections[1].points[:num_points], radius
+    )
+    if not crossing.valid.all():
+        raise UnreachableRadiusError(
+            f'Radius {radius} of injection {i} cannot be reached by '
+            f'{np.count_nonzero(~crossing.valid)} point pairs of sections '
+            f'{sections[0].section} and {sections[1].section}'
+        )
+    return BladeCurves(
+        points=crossing.points,
+        curve_name=f'{blade}_{side}_radius_{radius}_injection_{i}',
+        radius=radius, side=side, blade=blade,
+        section=f'injection_{i}_radius_{radius}', injection=True,
+        registry=injection_registry
+    )
+
+
+def build_injection_sections(inj, i, registry=CLASS_REGISTRY, injection_registry=CLASS_REGISTRY,
+                             section_cache=None):
+    """
+    Builds a section at each radius of an injection row between the two
+    blade sections embracing it
+
+    :param: inj dict: an injection configuration row
+    :param: i int: a number of the injection
+    :param: registry SectionRegistry: a registry of blade sections, the class registry by default
+    :param: injection_registry SectionRegistry: a registry the injection
+        sections are added to, the class registry by default, None to keep
+        them unregistered
+    :param: section_cache SectionCache: sections reused across injections and
+        evaluations; a cached section keeps the name of the injection it was
+        built for and is not added to injection_registry again
+    :returns: list of BladeCurves, one per radius
+    :raises: UnreachableRadiusError if some point pairs cannot reach a radius
+    """
+    injection_sections = []
+    for radius in get_injection_radii(inj):
+        def build(radius=radius):
+            return build_injection_section(inj['blade'], inj['side'], radius, i,
+                                           registry, injection_registry)
+        if section_cache is None:
+            injection_sections.append(build())
+        else:
+            injection_sections.append(section_cache.get(inj['blade'], inj['side'], radius, build))
+    return injection_sections
+
+
+def get_angle_keys(inj):
+    """
+    :returns: tuple of the inclination and the compound angle keys of an
+        injection row, None for a missing column
+    """
+    inclination_key = next((k for k in inj.keys() if re.search(INCLINATION_PATTERN, k)), None)
+    compound_key = next((k for k in inj.keys() if re.search(COMPOUND_PATTERN, k)), None)
+    return inclination_key, compound_key
+
+
+def has_hole_angles(inj):
+    return any(key is not None and inj[key] not in (None, '') for key in get_angle_keys(inj))
+
+
+def get_hole_angles(inj, num_s):
+    """
+    Angles of the holes at each relative length s, a single value applies to
+    all of them. A missing inclination makes holes normal to the surface, a
+    missing compound angle keeps them in the streamwise plane.
+
+    :returns: tuple of numpy.ndarray (num_s,) of inclination and compound angles in degrees
+    :raises: ValueError if the angles cannot be converted to float or their
+        number matches neither 1 nor num_s
+    """
+    angles = []
+    for key, default in zip(get_angle_keys(inj), (90.0, 0.0)):
+        if key is None or inj[key] in (None, ''):
+            values = np.full(num_s, default)
+        else:
+            values = np.array([float(v) for v in inj[key].split(' ')])
+            if len(values) not in (1, num_s):
+                raise ValueError(f'{key} has {len(values)} values for {num_s} holes')
+            values = np.broadcast_to(values, (num_s,))
+        angles.append(values)
+    return tuple(angles)
+
+
+def build_surfaces(blade, side, registry=CLASS_REGISTRY, surfaces=None):
+    """
+    :param: surfaces dict: {(blade, side): BladeSurface} of surfaces built
+        before, which are reused and to which new ones are added, so each
+        side of a blade is built once whichever side its holes are on
+    :returns: tuple of BladeSurface of a blade side and BladeSurface of the
+        other side of the blade, None if it is not registered
+    """
+    registry = resolve_registry(registry)
+    surfaces = {} if surfaces is None else surfaces
+
+    def surface_of(surface_side):
+        if (blade, surface_side) not in surfaces:
+            surfaces[(blade, surface_side)] = BladeSurface.from_registry(registry, blade, surface_side)
+        return surfaces[(blade, surface_side)]
+
+    opposite = None
+    for other_blade, other_side in registry.keys():
+        if other_blade == blade and other_side != side and len(registry.sections(blade, other_side)) > 1:
+            opposite = surface_of(other_side)
+            break
+    return surface_of(side), opposite
+
+
+def get_hole_directions(inj, s, surface, opposite=None):
+    """
+    :param: inj dict: an injection configuration row with hole angle columns
+    :param: s numpy.ndarray: relative lengths of the holes
+    :param: surface BladeSurface: the blade side of the injection
+    :param: opposite BladeSurface: the other blade side orienting the normals out of the blade
+    :returns: numpy.ndarray (len(radii) * len(s) x 3) of unit hole directions
+        in the order of place_holes
+    """
+    radii = get_injection_radii(inj)
+    inclination, compound = get_hole_angles(inj, len(s))
+    return hole_directions(
+        surface, np.tile(s, len(radii)), np.repeat(radii, len(s)),
+        np.tile(inclination, len(radii)), np.tile(compound, len(radii)), opposite
+    )
+
+
+def get_hole_positions(inj):
+    """
+    :returns: tuple of the relative lengths s and the hole diameter of an injection row
+    :raises: ValueError if they cannot be converted to float
+    """
+    radius_key, hole_diameter_key = get_keys(inj)
+    s = np.array([float(si) for si in inj['s'].split(' ')])
+    return s, float(inj[hole_diameter_key])
+
+
+def place_holes(injection_sections, s):
+    """
+    :returns: numpy.ndarray (len(sections) * len(s) x 3) of absolute coordinates
+    of the injection points for each radius and relative length s
+    """
+    return np.concatenate([
+        injection_section.get_abs_coordinates(s) for injection_section in injection_sections
+    ])
+
+
+def legacy_direction(blade):
+    """
+    :returns: tuple of the hole direction along the axis, (0, 0, -1) for
+        rotor blades and (0, 0, 1) for vanes
+    """
+    return 0, 0, -1 if re.search(r'(rb\d+)', blade) else 1
+
+
+def get_export_job(inj, i, points, diameter, injections_dir, coef=COEF, directions=None):
+    """
+    :param: directions numpy.ndarray (M x 3): hole directions, (0, 0, -1) for
+        rotor blades and (0, 0, 1) for vanes if None
+    :returns: dict of cfx_export.write_injection_csv arguments of an injection
+    :raises: ValueError if a parameter column has no known unit
+    """
+    radius_key, hole_diameter_key = get_keys(inj)
+    angle_keys = [key for key in get_angle_keys(inj) if key is not None]
+
+    # Setting Ansys csv injection file name
+    injection_file_name = f"{inj['blade']}_{inj['side']}_injection_{i}.csv"
+
+    # Injection parameters except hole positions and diameters
+    parameters = [
+        (key.split(' ')[0], val, column_unit(key))
+        for key, val in inj.items()
+        if key not in ['blade', 'side', 's', hole_diameter_key, radius_key] + angle_keys
+    ]
+    if directions is None:
+        directions = legacy_direction(inj['blade'])
+
+    return {
+        'injection_file': os.path.join(injections_dir, injection_file_name),
+        'injection_name': f"Injection {inj['blade']} {inj['side']} {i}",
+        'parameters': parameters, 'points': points,
+        'directions': directions, 'diameter': diameter, 'coef': coef
+    }
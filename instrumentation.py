@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+_NULL_STAGE = nullcontext()
+
+
+class Instrumentation:
+
+    """
+    Per-stage timing, memory and counters of a pipeline run
+
+    A disabled instance records nothing: stage() returns a shared no-op
+    context manager and count() returns at once.
+
+    Attributes
+    __________
+    :parameter: enabled bool: whether measurements are recorded
+    :parameter: trace_memory bool: whether peak Python memory per stage is
+        traced with tracemalloc, which slows allocation heavy stages several
+        times, so it is off by default and the timings of such a run are not
+        representative
+    :parameter: stages list: records of finished stages
+    :parameter: counters dict: {name: value} of counted quantities
+
+    Methods
+    _______
+    stage(name):
+        a context manager measuring wall time, CPU time and, if traced, peak memory
+    count(name, value=1):
+        adds value to a counter
+    maximum(name, value):
+        keeps the largest value of a counter
+    report():
+        :returns: dict of stage records, per-stage totals, counters and
+        Chrome trace events
+    write(file_name):
+        writes the report as JSON
+    """
+
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.stages = []
+        self.counters = {}
+        self.__origin = time.perf_counter()
+        self.__peaks = []
+        self.__depth = 0
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return self.__stage(name)
+
+    @contextmanager
+    def __stage(self, name):
+        if self.trace_memory:
+            if self.__peaks:
+                self.__peaks[-1] = max(self.__peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self.__peaks.append(0)
+        self.__depth += 1
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.__depth -= 1
+            record = {
+                'name': name, 'depth': self.__depth,
+                'start': wall - self.__origin,
+                'wall': time.perf_counter() - wall,
+                'cpu': time.process_time() - cpu
+            }
+            if self.trace_memory:
+                peak = max(self.__peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self.__peaks:
+                    self.__peaks[-1] = max(self.__peaks[-1], peak)
+                record['peak_memory'] = peak
+            self.stages.append(record)
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def maximum(self, name, value):
+        if self.enabled:
+            self.counters[name] = max(self.counters.get(name, value), value)
+
+    def report(self):
+        totals = {}
+        for record in self.stages:
+            total = totals.setdefault(record['name'], {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+            total['calls'] += 1
+            total['wall'] += record['wall']
+            total['cpu'] += record['cpu']
+            if 'peak_memory' in record:
+                total['peak_memory'] = max(total.get('peak_memory', 0), record['peak_memory'])
+
+        pid = os.getpid()
+        events = [{
+            'name': record['name'], 'ph': 'X', 'pid': pid, 'tid': 0,
+            'ts': record['start'] * 1e6, 'dur': record['wall'] * 1e6,
+            'args': {k: v for k, v in record.items() if k in ('cpu', 'peak_memory')}
+        } for record in self.stages]
+        events.extend({
+            'name': name, 'ph': 'C', 'pid': pid, 'tid': 0,
+            'ts': (time.perf_counter() - self.__origin) * 1e6, 'args': {name: value}
+        } for name, value in self.counters.items())
+
+        return {
+            'stages': self.stages, 'totals': totals,
+            'counters': self.counters, 'traceEvents': events
+        }
+
+    def write(self, file_name):
+        if not self.enabled:
+            return
+        with open(file_name, 'w') as f:
+            json.dump(self.report(), f, indent=2)
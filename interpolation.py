@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
 
+import math
+from contextlib import contextmanager
+from functools import lru_cache
 
+import numpy as np
+
+from bezier import binomial
+from registry import SectionRegistry
+
+
+@lru_cache(maxsize=None)
 def factorial(n: int):
-    if n == 0:
-        return 1
-    else:
-        return n * factorial(n - 1)
+    return math.factorial(n)
 
 
 def bernstein_func(n: int, i: int, s: float):
-    return (factorial(n) / (factorial(i) * factorial(n - i))) * (s ** i) * (1 - s) ** (n - i)
+    return binomial(n, i) * (s ** i) * (1 - s) ** (n - i)
 
 
 class Interpolation:
@@ -19,18 +26,18 @@ class Interpolation:
 
     Attributes
     __________
-    :parameter: points list: a list of curve points
+    :parameter: points numpy.ndarray: a contiguous float64 (N x 3) array of
+        curve points, an array given in this form is kept without copying
     :parameter: curve_name str: a curve name
-    :parameter: length list: a list where the length of pieces will be written
+    :parameter: lengths numpy.ndarray: lengths of the pieces of the curve
     :parameter: full_length float: a full length of an entire curve
-    :parameter: instances list: a list of all instances of the class
 
     Methods
     _______
     line_length(x: list, y: list, z: list):
         :returns: float a length of a spatial line
     set_lengths(coefficients: list, x_low_bound, x_high_bound, num_points=1000):
-        :returns: list a length of a curve by using a polynomial
+        :returns: numpy.ndarray lengths of pieces of a polynomial curve appended to lengths
     get_polynomial_derivative(derivative_degree, polynomial_degree, point):
         :returns: list of coefficients of polynomial by known point
     __get_polynomial_derivative(derivative_degree: int, polynomial_degree, pt):
@@ -38,19 +45,18 @@ class Interpolation:
     get_full_length():
         :returns: float full length of an entire curve
     get_lengths():
-        :returns: list of lengths of pieces
+        :returns: numpy.ndarray of lengths of pieces
     """
-    instances = []
+    __slots__ = ('__points', '__curve_name', 'lengths', 'full_length', '__weakref__')
 
     def __init__(self, **kwargs):
 
-        self.__points = kwargs.get('points', [])
+        points = np.ascontiguousarray(kwargs.get('points', ()), dtype=np.float64)
+        self.__points = points.reshape(0, 3) if points.size == 0 else points
         self.__curve_name = kwargs.get('curve_name', None)
-        self.lengths = []
+        self.lengths = np.empty(0, dtype=np.float64)
         self.full_length = 0.0
 
-        self.instances.append(self)
-
     @property
     def points(self):
         return self.__points
@@ -83,14 +89,10 @@ class Interpolation:
             return factorial(polynomial_degree) * pt ** 0
 
     def set_lengths(self, coefficients: list, x_low_bound, x_high_bound, num_points=1000):
-        dx = (x_high_bound - x_low_bound) / num_points
-        x = [x_low_bound + dx * n for n in range(0, num_points + 1)]
-        y = []
-        for xi in x:
-            y.append(sum([a * xi ** i for i, a in enumerate(coefficients[::-1])]))
-        for i, xi in enumerate(x):
-            if i != len(x) - 1:
-                self.lengths.append(self.line_length([x[i], x[i + 1]], [y[i], y[i + 1]]))
+        x = np.linspace(x_low_bound, x_high_bound, num_points + 1)
+        y = np.polyval(coefficients, x)
+        self.lengths = np.concatenate((self.lengths, np.hypot(np.diff(x), np.diff(y))))
+        return self.lengths
 
     def get_polynomial_derivative(self, derivative_degree, polynomial_degree, point):
         result = []
@@ -99,8 +101,8 @@ class Interpolation:
         return result
 
     def get_full_length(self):
-        if self.lengths:
-            return sum(self.lengths)
+        if len(self.lengths):
+            return float(np.sum(self.lengths))
         else:
             return None
 
@@ -113,50 +115,58 @@ class PiecewiseLinearInterpolation(Interpolation):
     """
     A children class to operate piecewise linear interpolation
 
+    Attributes
+    __________
+    :parameter: cumulative_lengths numpy.ndarray: arc length at each point,
+        starts with 0.0 and ends with the full length
+
     Methods
     _______
     set_piece_lengths():
-        :returns: list of length of each linear pieces
+        :returns: numpy.ndarray of length of each linear pieces
     get_abs_coordinates(s: float = 0.0)
-        :returns: list of coordinates according to relative length s
+        :returns: tuple of coordinates according to relative length s or
+        numpy.ndarray (M x 3) if s is an array of M relative lengths
     """
 
+    __slots__ = ('cumulative_lengths',)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.cumulative_lengths = None
 
     def set_piece_lengths(self):
-        for i, pnt in enumerate(self.points):
-            if i != len(self.points) - 1:
-                self.lengths.append(self.line_length(
-                    [self.points[i][0], self.points[i + 1][0]],
-                    [self.points[i][1], self.points[i + 1][1]],
-                    [self.points[i][2], self.points[i + 1][2]])
-                )
-
-    def get_abs_coordinates(self, s: float = 0.0):
-        abs_length = s * self.get_full_length()
-        current_length = 0
-        index = 0
-
-        for length in self.lengths:
-            current_length += length
-            if current_length >= abs_length:
-                index = self.lengths.index(length)
-                break
-
-        if index == 0:
-            si = abs_length / self.lengths[index]
-            xi = self.points[index][0] + si * (self.points[index + 1][0] - self.points[index][0])
-            yi = self.points[index][1] + si * (self.points[index + 1][1] - self.points[index][1])
-            zi = self.points[index][2] + si * (self.points[index + 1][2] - self.points[index][2])
-        else:
-            current_length = sum(self.lengths[i] for i in range(0, index))
-            si = (abs_length - current_length) / self.lengths[index]
-            xi = self.points[index][0] + si * (self.points[index + 1][0] - self.points[index][0])
-            yi = self.points[index][1] + si * (self.points[index + 1][1] - self.points[index][1])
-            zi = self.points[index][2] + si * (self.points[index + 1][2] - self.points[index][2])
+        delta = np.diff(self.points, axis=0)
+        pieces = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2 + delta[:, 2] ** 2)
+        self.cumulative_lengths = np.concatenate(([0.0], np.cumsum(pieces)))
+        self.lengths = pieces
+        self.full_length = float(self.cumulative_lengths[-1])
+        return self.lengths
 
-        return xi, yi, zi
+    def get_full_length(self):
+        if self.cumulative_lengths is None:
+            self.set_piece_lengths()
+        return float(self.cumulative_lengths[-1])
+
+    def get_abs_coordinates(self, s=0.0):
+        if self.cumulative_lengths is None:
+            self.set_piece_lengths()
+        points = self.points
+        cumulative = self.cumulative_lengths
+
+        s_values = np.asarray(s, dtype=np.float64)
+        abs_length = s_values.reshape(-1) * cumulative[-1]
+        # A piece whose end is the first to reach the absolute length
+        index = np.searchsorted(cumulative[1:], abs_length, side='left')
+        index = np.clip(index, 0, len(cumulative) - 2)
+        piece = cumulative[index + 1] - cumulative[index]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            si = np.where(piece > 0.0, (abs_length - cumulative[index]) / piece, 0.0)
+        coordinates = points[index] + si[:, None] * (points[index + 1] - points[index])
+
+        if s_values.ndim == 0:
+            return tuple(coordinates[0].tolist())
+        return coordinates
 
 
 class BladeCurves(PiecewiseLinearInterpolation):
@@ -171,6 +181,9 @@ class BladeCurves(PiecewiseLinearInterpolation):
     :parameter: side str: a side of curve (pressure or suction)
     :parameter: blade str: a name of a blade
     :parameter: section str: a name of a section
+    :parameter: injection bool: the curve is an injection section
+    :parameter: registry SectionRegistry: a registry the curve is added to,
+        the class registry by default, None to keep the curve unregistered
 
     Methods
     _______
@@ -178,10 +191,15 @@ class BladeCurves(PiecewiseLinearInterpolation):
         :returns: tuple of objects between which lies an object
         with a given radius
     return_index(obj):
-        :returns: index of an object in the instances list
+        :returns: index of an object among the sections of its blade side
+        in the class registry
+    scoped_registry():
+        a context manager replacing the class registry by an empty one
     """
 
-    injection_sections = []
+    __slots__ = ('__radius', '__side', '__blade', '__section')
+
+    registry = SectionRegistry()
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -191,6 +209,13 @@ class BladeCurves(PiecewiseLinearInterpolation):
         self.__blade = kwargs.get('blade', None)
         self.__section = kwargs.get('section', None)
 
+        registry = kwargs.get('registry', self.registry)
+        if registry is not None:
+            if kwargs.get('injection', False):
+                registry.add_injection(self)
+            else:
+                registry.add(self)
+
     @property
     def radius(self):
         return self.__radius
@@ -227,27 +252,30 @@ class BladeCurves(PiecewiseLinearInterpolation):
         :param: blade str: a name of blade
         :param: side str: a name of side
         :param: radius float: a radius lies between returned objects
+        :param: registry SectionRegistry: a registry to search, the class registry by default
         """
 
         blade = kwargs.get('blade', None)
         side = kwargs.get('side', None)
         radius = kwargs.get('radius', -1)
+        registry = kwargs.get('registry', cls.registry)
 
-        objects = [i for i in cls.instances
-                   if (i.blade, i.side) == (blade, side)]
+        return registry.bracket(blade, side, radius)
 
-        for i, obj in enumerate(objects):
-            if obj.radius > radius:
-                if i == 0:
-                    return objects[i + 1], obj
-                else:
-                    return objects[i - 1], obj
-        return objects[len(objects) - 1], objects[len(objects) - 2]
+    @classmethod
+    @contextmanager
+    def scoped_registry(cls):
+        previous = cls.registry
+        cls.registry = SectionRegistry()
+        try:
+            yield cls.registry
+        finally:
+            cls.registry = previous
 
     @classmethod
     def return_index(cls, obj):
         try:
-            index = cls.instances.index(obj)
+            index = cls.registry.sections(obj.blade, obj.side).index(obj)
             return index
         except ValueError as er:
             return None
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from collections import namedtuple
+
+import numpy as np
+
+
+RadiusIntersection = namedtuple('RadiusIntersection', ['points', 't', 'valid', 'extrapolated'])
+
+# Points this close to the cylinder, relative to radius^2, lie on it; written
+# sections at a hole radius are off it by the rounding of their coordinates
+ON_CYLINDER = 1e-8
+
+
+def intersect_radius(points1, points2, radius):
+    """
+    Intersects the lines through point pairs with the cylinder x^2 + y^2 = radius^2
+
+    A line p(t) = p1 + t * (p2 - p1) crosses the cylinder where
+    a * t^2 + b * t + c = 0 with a = dx^2 + dy^2, b = 2 * (x1 * dx + y1 * dy),
+    c = x1^2 + y1^2 - radius^2. Of two roots the one closest to the segment
+    [0, 1] is taken; a root outside it means the point is extrapolated.
+
+    :param: points1 array-like (N x 3): first points of the pairs
+    :param: points2 array-like (N x 3): second points of the pairs
+    :param: radius float or array-like (N,): a radius of the cylinder, one per pair if an array
+    :returns: RadiusIntersection of
+        points numpy.ndarray (N x 3): intersection points, NaN where there is no solution
+        t numpy.ndarray (N,): line parameters of the intersections
+        valid numpy.ndarray (N,): False for pairs without a solution (the line
+            passes inside the cylinder or is parallel to its axis) unless the
+            first point lies on the cylinder
+        extrapolated numpy.ndarray (N,): True where t lies outside [0, 1]
+    """
+    p1 = np.asarray(points1, dtype=np.float64).reshape(-1, 3)
+    p2 = np.asarray(points2, dtype=np.float64).reshape(-1, 3)
+    if p1.shape != p2.shape:
+        raise ValueError(f'Point arrays differ in shape: {p1.shape} and {p2.shape}')
+
+    d = p2 - p1
+    a = d[:, 0] ** 2 + d[:, 1] ** 2
+    b = 2.0 * (p1[:, 0] * d[:, 0] + p1[:, 1] * d[:, 1])
+    c = p1[:, 0] ** 2 + p1[:, 1] ** 2 - np.asarray(radius, dtype=np.float64) ** 2
+    discriminant = b ** 2 - 4.0 * a * c
+    on_cylinder = np.abs(c) <= ON_CYLINDER * np.asarray(radius, dtype=np.float64) ** 2
+    discriminant = np.where(on_cylinder, np.maximum(discriminant, 0.0), discriminant)
+
+    valid = ((a > 0.0) & (discriminant >= 0.0)) | on_cylinder
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Numerically stable roots: q = -(b + sign(b) * sqrt(D)) / 2, t = q / a, t = c / q
+        q = -0.5 * (b + np.copysign(np.sqrt(np.where(valid, discriminant, 0.0)), b))
+        t1 = q / a
+        t2 = np.where(q != 0.0, c / q, t1)
+    distance1 = np.maximum(-t1, 0.0) + np.maximum(t1 - 1.0, 0.0)
+    distance2 = np.maximum(-t2, 0.0) + np.maximum(t2 - 1.0, 0.0)
+    t = np.where(distance2 < distance1, t2, t1)
+    # A first point on the cylinder is the intersection of a line parallel to the axis
+    t = np.where(on_cylinder & (a <= 0.0), 0.0, t)
+    t = np.where(valid, t, np.nan)
+
+    points = p1 + t[:, None] * d
+    extrapolated = valid & ((t < 0.0) | (t > 1.0))
+    return RadiusIntersection(points, t, valid, extrapolated)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+import os
+import csv
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+from doe import GeometryModel
+from surface import BladeSurface
+from injection import COEF, resolve_registry, CLASS_REGISTRY
+
+
+Projection = namedtuple('Projection', ['side', 's', 'r', 'distance', 'points'])
+
+COARSE_POINTS = 256  # Grid points per section searched without scipy
+CHUNK_SIZE = 128  # Points searched at a time without scipy
+NEWTON_STEPS = 8
+
+
+class SurfaceIndex:
+
+    """
+    A spatial index of the sides of a blade mapping points to (side, s, r)
+
+    Points of the BladeSurface grids of all sides are put in a KD-tree, or
+    searched by brute force on a coarser grid when scipy is missing. The
+    nearest grid point gives a side and a first (s, r), which Gauss-Newton
+    steps refine to the foot of the perpendicular on that side, with s kept
+    in 0 - 1 and r within the radii of the sections.
+
+    Attributes
+    __________
+    :parameter: blade str: a name of the blade
+    :parameter: surfaces dict: {side: BladeSurface}
+
+    Methods
+    _______
+    from_registry(registry, blade, num_s=None):
+        :returns: SurfaceIndex of the registered sections of a blade
+    project(points):
+        :returns: Projection of points on the blade
+    """
+
+    def __init__(self, surfaces, blade=None):
+        self.surfaces = dict(surfaces)
+        if not self.surfaces:
+            raise ValueError('A surface index needs at least one blade side')
+        self.blade = blade if blade is not None else next(iter(self.surfaces.values())).blade
+        self.__sides = list(self.surfaces)
+
+        nodes, labels = [], []
+        for n, surface in enumerate(self.surfaces.values()):
+            stride = 1 if cKDTree is not None else max(1, len(surface.s) // COARSE_POINTS)
+            grid, s = surface.grid[:, ::stride], surface.s[::stride]
+            k, j = np.meshgrid(np.arange(grid.shape[0]), np.arange(grid.shape[1]), indexing='ij')
+            nodes.append(grid.reshape(-1, 3))
+            labels.append(np.column_stack([
+                np.full(k.size, n), s[j.reshape(-1)], surface.radii[k.reshape(-1)]
+            ]))
+        self.__nodes = np.concatenate(nodes)
+        self.__labels = np.concatenate(labels)
+        self.__tree = cKDTree(self.__nodes) if cKDTree is not None else None
+
+    @classmethod
+    def from_registry(cls, registry=CLASS_REGISTRY, blade=None, num_s=None):
+        registry = resolve_registry(registry)
+        surfaces = {side: BladeSurface.from_registry(registry, key_blade, side, num_s)
+                    for key_blade, side in registry.keys()
+                    if key_blade == blade and len(registry.sections(key_blade, side)) > 1}
+        return cls(surfaces, blade)
+
+    def _nearest(self, points):
+        if self.__tree is not None:
+            return self.__tree.query(points)[1]
+        nearest = np.empty(len(points), dtype=np.intp)
+        squared = np.einsum('ij,ij->i', self.__nodes, self.__nodes)
+        for first in range(0, len(points), CHUNK_SIZE):
+            chunk = points[first:first + CHUNK_SIZE]
+            # |x - y|^2 without the |x|^2 term, which does not change the nearest node
+            nearest[first:first + CHUNK_SIZE] = (squared[None, :] - 2.0 * chunk @ self.__nodes.T).argmin(axis=1)
+        return nearest
+
+    def project(self, points):
+        """
+        :param: points array-like (M x 3): points in model units
+        :returns: Projection of
+            side numpy.ndarray (M,) of side names,
+            s numpy.ndarray (M,) of normalized arc lengths,
+            r numpy.ndarray (M,) of radii,
+            distance numpy.ndarray (M,) of distances to the projections,
+            points numpy.ndarray (M x 3) of the projections
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        labels = self.__labels[self._nearest(points)]
+        side_index = labels[:, 0].astype(np.intp)
+        s, r = labels[:, 1].copy(), labels[:, 2].copy()
+        projected = np.empty_like(points)
+
+        for n, surface in enumerate(self.surfaces.values()):
+            mask = side_index == n
+            if not mask.any():
+                continue
+            target, s_n, r_n = points[mask], s[mask], r[mask]
+            for _ in range(NEWTON_STEPS):
+                residual = surface.place(s_n, r_n) - target
+                dp_ds, dp_dr = surface.tangents(s_n, r_n)
+                # Normal equations of the least squares step in (s, r)
+                a, b, c = (np.einsum('ij,ij->i', dp_ds, dp_ds), np.einsum('ij,ij->i', dp_ds, dp_dr),
+                           np.einsum('ij,ij->i', dp_dr, dp_dr))
+                g_s, g_r = np.einsum('ij,ij->i', dp_ds, residual), np.einsum('ij,ij->i', dp_dr, residual)
+                det = a * c - b * b
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    ds = np.where(det > 0.0, (c * g_s - b * g_r) / det, 0.0)
+                    dr = np.where(det > 0.0, (a * g_r - b * g_s) / det, 0.0)
+                s_n = np.clip(s_n - ds, 0.0, 1.0)
+                r_n = np.clip(r_n - dr, surface.radii[0], surface.radii[-1])
+            s[mask], r[mask] = s_n, r_n
+            projected[mask] = surface.place(s_n, r_n)
+
+        return Projection(
+            np.array(self.__sides, dtype=object)[side_index], s, r,
+            np.linalg.norm(projected - points, axis=1), projected
+        )
+
+
+def read_points(points_file, coef=COEF):
+    """
+    Reads hole coordinates of an Ansys CFX injection file or of a csv file of
+    x, y, z rows in meters; rows that are not numbers are skipped
+
+    :returns: numpy.ndarray (M x 3) of points in model units
+    """
+    with open(points_file, newline='') as f:
+        lines = f.read().splitlines()
+    if '[Data]' in lines:
+        lines = lines[lines.index('[Data]') + 1:]
+    points = []
+    for row in csv.reader(lines):
+        try:
+            points.append([float(v) for v in row[:3]])
+        except (ValueError, IndexError):
+            continue
+    return np.array(points, dtype=np.float64).reshape(-1, 3) * coef
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Map hole coordinates to blade side, s and r')
+    parser.add_argument('points', help='CFX injection file or csv of x, y, z in meters')
+    parser.add_argument('blade', help='name of the blade, e.g. rb1')
+    parser.add_argument('--geomturbo-dir', default=os.path.join('.', 'geomturbo'),
+                        help='directory of geomTurbo files')
+    parser.add_argument('--output', help='csv file of the projections, stdout if omitted')
+    args = parser.parse_args()
+
+    model = GeometryModel(args.geomturbo_dir, section_cache=False)
+    projection = SurfaceIndex.from_registry(model.registry, args.blade).project(read_points(args.points))
+
+    rows = [['side', 's', 'r [mm]', 'distance [mm]']]
+    rows.extend([side, f'{s}', f'{r}', f'{d}'] for side, s, r, d in
+                zip(projection.side, projection.s, projection.r, projection.distance))
+    text = ''.join(', '.join(row) + '\n' for row in rows)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text, end='')
@@ -1,16 +1,29 @@
 # -*- coding: utf-8 -*-
 
 import os
+import atexit
+import argparse
 import platform
 import logging
 import re
-import csv
-import subprocess
 import sys
 
-
-from parse_geom import parse_geomturbo
-from interpolation import BladeCurves
+from geom_cache import GeometryCache
+from geom_loader import load_geometry, load_geometry_parallel
+from intersection import intersect_radius
+from instrumentation import Instrumentation
+from cfx_export import write_injection_files
+from manifest import BuildManifest, content_hash
+from pipeline import InjectionPipeline
+from placement import place_parallel
+from decimate import decimate_airfoil, summarize
+from server import serve
+from scheduler import AutoGridScheduler, AutoGridJob
+from injection import (
+    COEF, read_injection_config, get_blade_name, register_sections, build_injection_sections,
+    get_hole_positions, place_holes, get_export_job, UnreachableRadiusError,
+    has_hole_angles, build_surfaces, get_hole_directions
+)
 
 
 def get_os():
@@ -24,74 +37,75 @@ def find_directory(dir_pattern, directory):
     return False, None
 
 
-def radius_generator(points: list):
-    i = 0
-    while i < len(points):
-        yield ((points[i][0] ** 2 + points[i][1] ** 2) ** 0.5) / len(points)
-        i += 1
-
-
-def get_radius(point: list):
-    return (point[0] ** 2 + point[1] ** 2) ** 0.5
-
-
-def get_index(val, iterator):
-    for i in iterator:
-        if i > val:
-            return iterator.index(i)
-    return len(iterator) - 1
-
-
-def line_equation(p1: list, p2: list, x: float):
-    return [
-        x,
-        p1[1] + (x - p1[0]) * (p2[1] - p1[1]) / (p2[0] - p1[0]),
-        p1[2] + (x - p1[0]) * (p2[2] - p1[2]) / (p2[0] - p1[0])
-    ]
-
-
 def get_coordinates(pt1: list, pt2: list, value: float, n: int = 100):
-
-    pm = line_equation(pt1, pt2, (pt2[0] + pt1[0]) / 2)
-    current_value = get_radius(pm)
-    eps = 10 ** -6
-
-    if current_value > get_radius(pt2):
-        x = pt2[0] + (pt2[0] - pt1[0])
-        point1 = pt2
-        point2 = line_equation(pt1, pt2, x)
-        return get_coordinates(point1, point2, value, n)
-    elif current_value < get_radius(pt1):
-        x = pt1[0] - (pt2[0] - pt1[0])
-        point1 = line_equation(pt1, pt2, x)
-        point2 = pt1
-        return get_coordinates(point1, point2, value, n)
-
-    if abs(current_value - value) <= eps:
-        return pm
-    # Go to right side
-    elif current_value > value:
-        return get_coordinates(pt1, pm, value, n)
-    # Go to left side
-    elif current_value < value:
-        return get_coordinates(pm, pt2, value, n)
-    elif current_value == value:
-        return pm
+    crossing = intersect_radius(pt1, pt2, value)
+    if not crossing.valid[0]:
+        return None
+    return crossing.points[0].tolist()
+
+
+def exit_on_injection_error(logger, er):
+    """
+    Logs an error of placing injection holes and exits, the same way for
+    every placement mode
+    """
+    if isinstance(er, UnreachableRadiusError):
+        logger.error(f'{er}')
+        sys.exit(1)
+    elif isinstance(er, ValueError):
+        logger.error(f'An error occurred {er} while converting injection data to float.')
+        sys.exit(1)
+    elif isinstance(er, KeyError):
+        logger.error(f'Key error occurs while '
+                     f'trying to read injection '
+                     f'configuration dictionary.\n'
+                     f'There is no such key in the dictionary: {er}')
+        sys.exit(1)
+    logger.error(f'An error occurred while reading injection data. {er}')
+    sys.exit(-1)
 
 
 if __name__ == "__main__":
 
-    coef = 1000  # Units conversion
-    units = {
-        'm': 1000, 'dm': 100, 'cm': 10, 'mm': 1
-    }
-
-    # Patterns to search units, section radius and injection hole diameters
-    unit_pattern = re.compile(
-        r'(\bm{1,2}\b)|(\bcm\b)|(\bdm\b)|(\bC\b)|(\bK\b)|(\bkg\s+s-1\b)'
+    parser = argparse.ArgumentParser(
+        description='Generate cooling hole injections for Ansys CFX and run AutoGrid'
     )
-    radius_pattern = re.compile(r'(\br\s+\[\w+\])')
-    hole_diameter_pattern = re.compile(r'(\bDiameter\s+\[\w+\])')
+    parser.add_argument('--cache-dir', default=os.path.join('.', '.geomcache'),
+                        help='directory of the parsed geomTurbo geometry cache')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always parse geomTurbo files from text')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes parsing geomTurbo files in parallel')
+    parser.add_argument('--decimate', type=float, metavar='TOLERANCE',
+                        help='reduce sections to a chordal tolerance in model units before placing holes')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='number of threads placing independent (blade, side) groups of injections')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='parse, interpolate and write each geomTurbo file as soon as it is ready')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='write per-stage timings and counters to a JSON trace file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='add peak Python memory per stage to the trace; slows the traced run')
+    parser.add_argument('--incremental', action='store_true',
+                        help='recompute only injections whose inputs changed and skip AutoGrid '
+                             'when no geomTurbo file changed')
+    parser.add_argument('--manifest', default=os.path.join('.', '.cooling_manifest.json'),
+                        help='manifest of content hashes used by --incremental')
+    parser.add_argument('--igg', metavar='COMMAND',
+                        help='igg executable and its leading arguments, found by the OS if omitted')
+    parser.add_argument('--autogrid-timeout', type=float, default=None,
+                        help='seconds after which AutoGrid is killed')
+    parser.add_argument('--serve', action='store_true',
+                        help='keep the geometry in memory and serve JSON injection requests')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='Unix socket served by --serve, stdin and stdout if omitted')
+    args = parser.parse_args()
+
+    instrumentation = Instrumentation(enabled=bool(args.trace), trace_memory=args.trace_memory)
+    if args.trace:
+        atexit.register(instrumentation.write, args.trace)
+
+    coef = COEF  # Units conversion
 
     # Logger configuration
     log_file = os.path.join('.', 'optimization.log')
@@ -101,54 +115,69 @@ if __name__ == "__main__":
     )
     logger = logging.getLogger(__name__)
 
+    if args.serve:
+        serve(args.socket, os.path.join('.', 'geomturbo'),
+              None if args.no_cache else args.cache_dir, args.workers)
+        sys.exit(0)
+
     # geomTurbo directory reading, geomTurbo file searching
     geomturbo_dir = os.path.join('.', 'geomturbo')
-    try:
-        gt_files = [os.path.join(geomturbo_dir, f)
-                    for f in os.listdir(geomturbo_dir)
-                    if os.path.splitext(f)[1] == '.geomTurbo']
-    except FileNotFoundError:
-        gt_files = []
-        log_msg = f'System could not find the specified path {geomturbo_dir}'
-        logger.error(log_msg)
+    with instrumentation.stage('directory_scan'):
+        try:
+            gt_files = [os.path.join(geomturbo_dir, f)
+                        for f in os.listdir(geomturbo_dir)
+                        if os.path.splitext(f)[1] == '.geomTurbo']
+        except FileNotFoundError:
+            gt_files = []
+            log_msg = f'System could not find the specified path {geomturbo_dir}'
+            logger.error(log_msg)
+    instrumentation.count('geomturbo_files', len(gt_files))
 
     # Injection configuration
     injections = []
     injection_cfg_file = os.path.join('.', 'injections.cfg')
     # Reading the injection configuration file and writing it into dictionary
-    try:
-        with open(injection_cfg_file, newline='') as inj_cfg:
-            cfg = csv.DictReader(inj_cfg)
-            for row in cfg:
-                injections.append(row)
-    except FileNotFoundError:
-        logger.error(f'Injection configuration file {injection_cfg_file} has not been found.')
-        injections = None
+    with instrumentation.stage('config_read'):
+        try:
+            injections = read_injection_config(injection_cfg_file)
+        except FileNotFoundError:
+            logger.error(f'Injection configuration file {injection_cfg_file} has not been found.')
+            injections = None
+
+    manifest = BuildManifest(args.manifest) if args.incremental else None
 
     # Generating list of cooling blade and side
     if injections:
-        items = [f'{b["blade"]}_{b["side"]}' for b in injections]
 
-        pattern = re.compile(r'(rb_?\d+)|(gv_?\d+)')
-        radii = {}
-        xyz = {}
+        blade_files = {get_blade_name(gtf): gtf for gtf in gt_files}
+
+        # Injections whose configuration row, blade geometry or decimation changed since the last run
+        pending = set(range(1, len(injections) + 1))
+        row_inputs = {}
+        if manifest:
+            for i, inj in enumerate(injections, 1):
+                gtf = blade_files.get(inj['blade'])
+                row_inputs[i] = content_hash(inj, manifest.geomturbo_hash(gtf) if gtf else None, args.decimate)
+                if manifest.is_up_to_date(f'injection_{i}', row_inputs[i]):
+                    pending.discard(i)
+            instrumentation.count('injections_up_to_date', len(injections) - len(pending))
 
         # Reading geomTurbo file and writing coordinates into dictionary
-        for gtf in gt_files:
-            points_dict = parse_geomturbo(gtf)
-            blade = re.search(pattern, os.path.split(gtf)[1]).group()
-
-            for side, section_dict in points_dict.items():
-                if f'{blade}_{side}' in items:
-                    for section, pts in section_dict.items():
-                        section_name = f'{section.split(" ")[1]}_{section.split(" ")[2]}'
-                        radius = sum([r for r in radius_generator(pts)])
-                        xyz[f'{blade}_{side}_{section_name}'] = pts
-                        BladeCurves(
-                            points=pts, curve_name=f'{blade}_{side}_{section_name}',
-                            radius=radius,
-                            side=side, blade=blade, section=section_name
-                        )
+        geometry_cache = None
+        if not args.no_cache:
+            try:
+                geometry_cache = GeometryCache(args.cache_dir)
+                geometry_cache.prune()
+            except OSError as er:
+                logger.warning(f'Geometry cache {args.cache_dir} is disabled. An error occurs {er}')
+
+        gt_blades, gt_sides = {}, {}
+        for blade, gtf in blade_files.items():
+            rows = [b for i, b in enumerate(injections, 1) if i in pending and b['blade'] == blade]
+            if rows:
+                # Hole directions need the other blade side to orient surface normals
+                gt_blades[gtf] = blade
+                gt_sides[gtf] = None if any(has_hole_angles(b) for b in rows) else {b['side'] for b in rows}
 
         injections_dir = os.path.join('.', 'injections')
         try:
@@ -161,107 +190,150 @@ if __name__ == "__main__":
         except FileExistsError as er:
             logger.warning(f'Failed to create directory {injections_dir}. An error occurs {er}')
 
-        # Find section embracing an injection radius
-        keys_pattern = [
-            r'(\br\s+\[\w+\])', r'(\bDiameter\s+\[\w+\])',
-            r'(\bTemperature\s+\[\w+\])',
-            r'(\bMass\sFlow\sRate\s+\[\w+\s+\])'
-        ]
-
-        for i, inj in enumerate(injections, 1):
-            try:
-                radius_key = [k for k in inj.keys() if re.search(radius_pattern, k)][0]
-                radius_unit = re.search(unit_pattern, radius_key).group()
-                unit = units[radius_unit]
-                radii = [float(r) * unit for r in inj[radius_key].split(' ')]
-                for radius in radii:
-                    section = []
-                    sections = BladeCurves.get_obj(blade=inj['blade'], side=inj['side'], radius=radius)
-                    for p1, p2 in zip(sections[0].points, sections[1].points):
-                        section.append(get_coordinates(p1, p2, radius))
-                    BladeCurves(
-                        points=section,
-                        curve_name=f'{inj["blade"]}_{inj["side"]}_radius_{radius}_injection_{i}',
-                        radius=radius, side=inj['side'], blade=inj['blade'],
-                        section=f'injection_{i}_radius_{radius}'
-                    )
-            except ValueError as er:
-                logger.error(f'An error occurred {er}. Tried to convert '
-                             f'Injection radius to float: {inj["r"].split(" ")[0]}')
+        if args.pipeline:
+            # Each geomTurbo file is parsed, interpolated and written as soon as it is ready
+            pipeline = InjectionPipeline(
+                injections_dir, workers=args.workers,
+                cache_dir=geometry_cache.cache_dir if geometry_cache else None, coef=coef,
+                decimate=args.decimate
+            )
+            pipeline_files = {
+                gtf: (blade, gt_sides[gtf],
+                      [(i, inj) for i, inj in enumerate(injections, 1)
+                       if i in pending and inj['blade'] == blade])
+                for gtf, blade in gt_blades.items()
+            }
+            missing = {inj['blade'] for i, inj in enumerate(injections, 1)
+                       if i in pending and inj['blade'] not in blade_files}
+            if missing:
+                logger.error(f'There is no geomTurbo file of blades {", ".join(sorted(missing))}')
                 sys.exit(1)
-            except KeyError as er:
-                logger.error(f'Key error occurs while '
-                             f'trying to read injection '
-                             f'configuration dictionary.\n'
-                             f'There is no such key in the dictionary: {er}')
-                sys.exit(1)
-            except TypeError as er:
-                logger.error(f'An error occurred while reading injection data.')
-                sys.exit(-1)
-
-        # Writing Ansys csv injection region file
-        # Finding injection region sections
-        injection_pattern = re.compile(r'(injection_\d+)')
-        injection_regions = [
-            obj for obj in BladeCurves.instances if re.search(injection_pattern, obj.section)
-        ]
-
-        for i, inj in enumerate(injections, 1):
-
-            # Getting radius, diameter of injection holes dict key and their units
-            radius_key = [k for k in inj.keys() if re.search(radius_pattern, k)][0]
-            radius_unit = re.search(unit_pattern, radius_key).group()
-            hole_diameter_key = [k for k in inj.keys() if re.search(hole_diameter_pattern, k)][0]
-            radii = [float(r) for r in inj[radius_key].split(' ')]
-
-            # Setting Ansys csv injection file name
-            injection_file_name = f"{inj['blade']}_{inj['side']}_injection_{i}.csv"
-            injection_file = os.path.join(injections_dir, injection_file_name)
-            injection_name = f"Injection {inj['blade']} {inj['side']} {i}"
-
-            with open(injection_file, 'w', newline='') as f:
-                # Writing file header with injection name and parameters
-                f.write('[Name]\n')
-                f.write(f'{injection_name}\n\n')
-                f.write(f'[Parameters]\n')
-                # Writing injection parameters
-                for key, val in inj.items():
-                    if key not in ['blade', 'side', 's', hole_diameter_key, radius_key]:
-                        key_parameter = key.split(' ')[0]
-                        key_unit = re.search(unit_pattern, key).group()
-                        f.write(f'{key_parameter} = {val} [{key_unit}]\n')
-                f.write('\n\n')
-                f.write('[Spatial Fields]\n')
-                f.write('x, y, z\n\n')
-                f.write('[Data]\n')
-                f.write('x [ m ], y[ m ], z [ m ], Direction u [], Direction v [], Direction w []\n')
-
-                # Writing absolute coordinates of the injection points
-                # for each radius and relative length s
-                for radius in radii:
-                    injection_section = [
-                       obj for obj in injection_regions if (
-                                obj.radius == radius * units[radius_unit] and
-                                obj.blade == inj['blade'] and
-                                obj.side == inj['side']
-                        )
-                    ][0]
-                    injection_section.set_piece_lengths()
+            with instrumentation.stage('pipeline'):
+                try:
+                    written = pipeline.run(pipeline_files)
+                except (ValueError, KeyError, TypeError, IndexError) as er:
+                    exit_on_injection_error(logger, er)
+            for injection_file, holes in written.values():
+                instrumentation.count('holes', holes)
+                instrumentation.count('csv_files')
+            export_files = {i: injection_file for i, (injection_file, holes) in written.items()}
+        else:
+            with instrumentation.stage('geomturbo_parse'):
+                if args.workers > 1:
+                    shared_geometry = load_geometry_parallel(
+                        gt_sides, workers=args.workers,
+                        cache_dir=geometry_cache.cache_dir if geometry_cache else None
+                    )
+                    airfoils = shared_geometry.airfoils
+                else:
+                    airfoils = {gtf: load_geometry(gtf, gt_sides[gtf], geometry_cache)
+                                for gtf in gt_blades}
+
+            if args.decimate is not None:
+                with instrumentation.stage('decimation'):
+                    for gtf in gt_blades:
+                        airfoils[gtf], report = decimate_airfoil(airfoils[gtf], args.decimate)
+                        summary = summarize([report])
+                        instrumentation.count('decimation_points', summary['points'])
+                        instrumentation.count('decimation_kept', summary['kept'])
+                        instrumentation.maximum('decimation_max_deviation', summary['max_deviation'])
+                        print(f'Sections of {gtf} have been reduced from {summary["points"]} '
+                              f'to {summary["kept"]} points, the maximum deviation is '
+                              f'{summary["max_deviation"]:.6g}')
+
+            with instrumentation.stage('section_registration'):
+                for gtf, blade in gt_blades.items():
+                    for curve in register_sections(airfoils[gtf], blade, gt_sides[gtf]):
+                        instrumentation.count('sections')
+                        instrumentation.count('section_points', len(curve.points))
+
+            if args.threads > 1:
+                # Independent (blade, side) groups of injections are placed concurrently
+                with instrumentation.stage('injection_placement'):
                     try:
-                        s = [float(si) for si in inj['s'].split(' ')]
-                        d = float(inj[hole_diameter_key])
-                    except ValueError as er:
-                        logger.error(f'Trying to convert {inj["s"]} to float. An error occurs {er}')
-                        sys.exit(-1)
-                    for si in s:
-                        x, y, z = injection_section.get_abs_coordinates(si)
-                        zdir = -1 if re.search(r'(rb\d+)', inj['blade']) else 1
-                        f.write(f'{x / coef}, {y / coef}, {z / coef}, 0, 0, {zdir}, {d}\n')
+                        placed = place_parallel(
+                            [(i, inj) for i, inj in enumerate(injections, 1) if i in pending],
+                            injections_dir, workers=args.threads, coef=coef
+                        )
+                    except (ValueError, KeyError, TypeError, IndexError) as er:
+                        exit_on_injection_error(logger, er)
+                export_keys = [i for i, job in placed]
+                export_jobs = [job for i, job in placed]
+
+                with instrumentation.stage('csv_writing'):
+                    for holes in write_injection_files(export_jobs):
+                        instrumentation.count('holes', holes)
+                        instrumentation.count('csv_files')
+            else:
+                # Find section embracing an injection radius
+                injection_sections = {}
+                with instrumentation.stage('injection_interpolation'):
+                    for i, inj in enumerate(injections, 1):
+                        if i not in pending:
+                            continue
+                        try:
+                            injection_sections[i] = build_injection_sections(inj, i)
+                        except (ValueError, KeyError, TypeError, IndexError) as er:
+                            exit_on_injection_error(logger, er)
+                        for injection_section in injection_sections[i]:
+                            instrumentation.count('bracket_lookups')
+                            instrumentation.count('intersection_pairs', len(injection_section.points))
+                            instrumentation.count('injection_sections')
+
+                # Writing Ansys csv injection region file
+                with instrumentation.stage('csv_writing'):
+                    export_jobs, export_keys = [], []
+                    surfaces = {}
+                    for i, inj in enumerate(injections, 1):
+                        if i not in pending:
+                            continue
+
+                        try:
+                            s, d = get_hole_positions(inj)
+
+                            # Absolute coordinates of the injection points
+                            # for each radius and relative length s
+                            points = place_holes(injection_sections[i], s)
+
+                            # Hole directions tilted from the surface normals by the configured angles
+                            directions = None
+                            if has_hole_angles(inj):
+                                directions = get_hole_directions(
+                                    inj, s, *build_surfaces(inj['blade'], inj['side'], surfaces=surfaces)
+                                )
+                        except (ValueError, KeyError, TypeError, IndexError) as er:
+                            exit_on_injection_error(logger, er)
+
+                        export_keys.append(i)
+                        export_jobs.append(get_export_job(inj, i, points, d, injections_dir, coef, directions))
+
+                    for holes in write_injection_files(export_jobs):
+                        instrumentation.count('holes', holes)
+                        instrumentation.count('csv_files')
+            export_files = {i: job['injection_file'] for i, job in zip(export_keys, export_jobs)}
+
+        if manifest:
+            for i, injection_file in export_files.items():
+                manifest.record(f'injection_{i}', row_inputs[i], [injection_file])
+            manifest.retain({f'injection_{i}' for i in range(1, len(injections) + 1)} | {'autogrid'})
+            manifest.save()
+
+    # AutoGrid is launched again only if a geomTurbo file changed
+    autogrid_inputs = None
+    if manifest:
+        autogrid_inputs = content_hash(sorted(
+            (os.path.split(gtf)[1], manifest.geomturbo_hash(gtf)) for gtf in gt_files
+        ))
+        if manifest.is_up_to_date('autogrid', autogrid_inputs):
+            logger.info('geomTurbo files have not changed, AutoGrid is skipped')
+            sys.exit(0)
 
     # Running AutoGrid
     os_name = get_os()
     igg_run_file = ''
-    if 'Windows' in os_name:
+    if args.igg:
+        igg_run_file = args.igg
+    elif 'Windows' in os_name:
         pattern = re.compile('(NUMECA\w+)')
         numeca = find_directory(pattern, 'C:\\')
         if numeca[0]:
@@ -275,14 +347,18 @@ if __name__ == "__main__":
         logger.error(f'Unknown os system {os_name[0]}')
         sys.exit(-1)
 
-    autogrid_python_file = os.path.join('.', 'autogrid.py')
+    scheduler = AutoGridScheduler(igg_run_file, timeout=args.autogrid_timeout)
+    with instrumentation.stage('autogrid'):
+        autogrid_run = scheduler.run_job(AutoGridJob('autogrid', '.'))
 
-    try:
-        subprocess.run([
-            igg_run_file, '-autogrid5', '-batch', '-script', autogrid_python_file
-        ])
-    except OSError as er:
-        logger.error(f'While starting {igg_run_file} an error occurs. {er}.\n'
+    if autogrid_run.status == 'error':
+        logger.error(f'While starting {igg_run_file} an error occurs.\n'
                      f'The parameter has been set incorrectly or file {igg_run_file}'
                      f' has not been found.')
         sys.exit(-1)
+    elif autogrid_run.status != 'ok':
+        sys.exit(-1)
+
+    if manifest:
+        manifest.record('autogrid', autogrid_inputs)
+        manifest.save()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import hashlib
+
+from geom_cache import file_hash
+
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(*items):
+    """
+    :returns: str a hash of JSON-serializable items
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for item in items:
+        digest.update(json.dumps(item, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class BuildManifest:
+
+    """
+    Content hashes of the inputs and outputs of a previous run
+
+    Attributes
+    __________
+    :parameter: manifest_file str: a path of the JSON manifest
+
+    Methods
+    _______
+    geomturbo_hash(gt_file):
+        :returns: str a content hash of a geomTurbo file, computed once per run
+    is_up_to_date(key, inputs):
+        :returns: bool whether a step ran with the same inputs and all of its
+        outputs still exist unchanged
+    record(key, inputs, outputs):
+        stores the inputs hash and hashes of the output files of a step
+    discard(key):
+        drops the record of a step
+    retain(keys):
+        drops records of all steps except the given ones
+    save():
+        writes the manifest
+    """
+
+    def __init__(self, manifest_file):
+        self.manifest_file = manifest_file
+        try:
+            with open(manifest_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get('version') != MANIFEST_VERSION:
+            data = {}
+        self.geomturbo = {}
+        self.steps = data.get('steps', {})
+
+    def geomturbo_hash(self, gt_file):
+        if gt_file not in self.geomturbo:
+            self.geomturbo[gt_file] = file_hash(gt_file)
+        return self.geomturbo[gt_file]
+
+    def is_up_to_date(self, key, inputs):
+        step = self.steps.get(key)
+        if step is None or step['inputs'] != inputs:
+            return False
+        for output, output_hash in step['outputs'].items():
+            try:
+                if file_hash(output) != output_hash:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def record(self, key, inputs, outputs=()):
+        self.steps[key] = {
+            'inputs': inputs,
+            'outputs': {output: file_hash(output) for output in outputs}
+        }
+
+    def discard(self, key):
+        self.steps.pop(key, None)
+
+    def retain(self, keys):
+        self.steps = {key: step for key, step in self.steps.items() if key in keys}
+
+    def save(self):
+        tmp_file = f'{self.manifest_file}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                'version': MANIFEST_VERSION, 'geomturbo': self.geomturbo, 'steps': self.steps
+            }, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
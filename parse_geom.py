@@ -1,50 +1,104 @@
 # -*- coding: utf-8 -*-
 
 import re
+from itertools import islice
+
+import numpy as np
+
+from geom_index import index_geomturbo
+
+
+SIDE_PATTERN = re.compile(r'(\s)*(suction|pressure)')
+SECTION_PATTERN = re.compile(r'(\s)*(#\s)?section\s*[0-9]+')
+START_ROW_PATTERN = re.compile(r'(\s)*NI_BEGIN(\s)*NIBLADEGEOMETRY')
+END_ROW_PATTERN = re.compile(r'(\s)*NI_END(\s)*NIBLADEGEOMETRY')
 
 
 def string_matches(pattern_string, seeking_line):
-    pattern = re.compile(pattern_string)
-    if pattern.match(seeking_line):
-        return True, pattern.match(seeking_line).group(0)
+    match = re.match(pattern_string, seeking_line)
+    if match:
+        return True, match.group(0)
     else:
         return False, None
 
 
-def parse_geomturbo(gt_file):
-    side_seeking = '(\s)*(suction|pressure)'
-    section_seeking = "(\s)*(#\s)?section\s*[0-9]+"
-    start_row = "(\s)*NI_BEGIN(\s)*NIBLADEGEOMETRY"
-    end_row = "(\s)*NI_END(\s)*NIBLADEGEOMETRY"
+def decode_points(lines, num_points: int):
+    """
+    Decodes a block of 'x y z' lines into a contiguous float64 array
+
+    :param: lines iterable: lines of a section point block
+    :param: num_points int: a number of points expected in the block
+    :returns: numpy.ndarray of shape (num_points, 3)
+    :raises: ValueError if the block is truncated or malformed
+    """
+    text = ''.join(lines)
+    values = np.array(text.split(), dtype=np.float64)
+    if values.size != 3 * num_points:
+        raise ValueError(f'Expected {num_points} points, '
+                         f'got {values.size / 3:g} in the section block')
+    return values.reshape(num_points, 3)
+
 
+def parse_geomturbo(gt_file):
+    """
+    Reads a geomTurbo file in one pass and returns the blade geometry
+    as a dictionary {side: {section: numpy.ndarray (N x 3)}}
+    """
     airfoil = {}
 
     with open(gt_file, 'r') as f:
         side = False
-        lines = iter(f.readlines())
         start_block = False
-        for row in lines:
+        for row in f:
             line = row.strip()
-            if string_matches(end_row, line)[0]:
+            if END_ROW_PATTERN.match(line):
                 break
-            elif string_matches(start_row, line)[0]:
+            elif START_ROW_PATTERN.match(line):
                 start_block = True
-            elif start_block and string_matches(side_seeking, line)[0]:
-                side = string_matches(side_seeking, line)[1]
+            elif not start_block:
+                continue
+            elif side_match := SIDE_PATTERN.match(line):
+                side = side_match.group(0)
                 airfoil[side] = {}
-            elif start_block and string_matches(section_seeking, line)[0]:
-                section = string_matches(section_seeking, line)[1]
+            elif section_match := SECTION_PATTERN.match(line):
+                section = section_match.group(0)
                 airfoil[side][section] = []
-                next(lines)
-                row = next(lines)
+                next(f)
+                row = next(f)
                 try:
                     num_lines = int(row)
-                    points = []
-                    for point in range(num_lines):
-                        row = next(lines)
-                        points.append([float(pt) for pt in row.strip().split()])
-                    airfoil[side][section] = points
+                    airfoil[side][section] = decode_points(islice(f, num_lines), num_lines)
                 except ValueError as ex:
                     msg = f'{ex}'
 
     return airfoil
+
+
+def load_sections(gt_file, index=None, sides=None, sections=None):
+    """
+    Decodes only the requested sections of a geomTurbo file by seeking
+    to their byte offsets recorded in the index
+
+    :param: gt_file str: a path of a geomTurbo file
+    :param: index GeomTurboIndex: an index of the file, built if omitted
+    :param: sides iterable: side names to load, all sides if None
+    :param: sections iterable: section names to load, all sections if None
+    :returns: dict {side: {section: numpy.ndarray (N x 3)}}
+    """
+    if index is None:
+        index = index_geomturbo(gt_file)
+
+    airfoil = {side: {} for side in index.sides if sides is None or side in sides}
+    with open(gt_file, 'rb') as f:
+        for entry in index.select(sides, sections):
+            airfoil[entry.side][entry.section] = []
+            if entry.num_points is None:
+                continue
+            f.seek(entry.data_offset)
+            block = f.read(entry.data_end - entry.data_offset).decode('latin-1')
+            try:
+                airfoil[entry.side][entry.section] = decode_points([block], entry.num_points)
+            except ValueError as ex:
+                msg = f'{ex}'
+
+    return airfoil
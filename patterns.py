@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import math
+import logging
+import argparse
+
+import numpy as np
+
+from doe import GeometryModel
+from cfx_export import write_injection_stream
+from directions import hole_directions
+from injection import (
+    UNITS, UNIT_PATTERN, RADIUS_PATTERN, HOLE_DIAMETER_PATTERN,
+    read_injection_config, get_angle_keys, has_hole_angles, get_hole_angles, legacy_direction
+)
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 4096  # Holes placed and written at a time
+
+# Columns of a pattern row besides blade, side, s, radius, diameter and hole angles
+PATTERN_KEYS = ['Pitch', 'Rows', 'Row Pitch', 'Stagger']
+
+
+class HoleRowPattern:
+
+    """
+    Parallel rows of equally spaced holes on a blade side
+
+    A row runs either along s at a fixed radius or along the radius at a
+    fixed s, from start to end with the given pitch. Further rows are
+    offset across by the row pitch and every other row is shifted along by
+    stagger * pitch; shifted holes past the end are dropped.
+
+    Attributes
+    __________
+    :parameter: blade str: a name of a blade
+    :parameter: side str: a side of the blade
+    :parameter: along str: 's' or 'r', the coordinate changing along a row
+    :parameter: start float: the first hole of a row
+    :parameter: end float: the last position of a row
+    :parameter: at float: the other coordinate of the first row
+    :parameter: pitch float: a hole spacing along a row
+    :parameter: rows int: a number of rows
+    :parameter: row_pitch float: a spacing of the rows, in the other coordinate
+    :parameter: stagger float: a shift of every other row as a fraction of pitch
+
+    Methods
+    _______
+    from_row(row):
+        :returns: HoleRowPattern of a pattern configuration row
+    iter_holes(chunk_size=CHUNK_SIZE):
+        yields tuples of numpy.ndarray s and r of the holes chunk by chunk
+    """
+
+    def __init__(self, blade, side, along, start, end, at, pitch, rows=1, row_pitch=0.0, stagger=0.0):
+        if along not in ('s', 'r'):
+            raise ValueError(f'A row runs along s or r, not {along}')
+        if pitch <= 0.0 or end < start:
+            raise ValueError(f'A row from {start} to {end} with pitch {pitch} has no holes')
+        self.blade = blade
+        self.side = side
+        self.along = along
+        self.start = start
+        self.end = end
+        self.at = at
+        self.pitch = pitch
+        self.rows = rows
+        self.row_pitch = row_pitch
+        self.stagger = stagger
+
+    def _holes_per_row(self, shift):
+        # The tolerance keeps a hole landing on the end despite rounding
+        return max(0, math.floor((self.end - self.start - shift) / self.pitch + 1e-9) + 1)
+
+    def __len__(self):
+        even, odd = self._holes_per_row(0.0), self._holes_per_row(self.stagger * self.pitch)
+        return even * ((self.rows + 1) // 2) + odd * (self.rows // 2)
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        :param: row dict: a row of a pattern configuration, s and r hold
+            'start end' along the row and a single value across it
+        :raises: ValueError, KeyError for a malformed row
+        """
+        radius_key = [k for k in row.keys() if re.search(RADIUS_PATTERN, k)][0]
+        unit = UNITS[re.search(UNIT_PATTERN, radius_key).group()]
+        s = [float(v) for v in row['s'].split(' ')]
+        r = [float(v) * unit for v in row[radius_key].split(' ')]
+        if len(s) == 2 and len(r) == 1:
+            along, (start, end), at = 's', s, r[0]
+            pitch = float(row['Pitch'])
+            row_pitch = float(row.get('Row Pitch') or 0) * unit
+            if start < 0.0 or end > 1.0:
+                raise ValueError(f'Relative lengths {start} - {end} lie outside 0 - 1')
+        elif len(s) == 1 and len(r) == 2:
+            along, (start, end), at = 'r', r, s[0]
+            pitch = float(row['Pitch']) * unit
+            row_pitch = float(row.get('Row Pitch') or 0)
+        else:
+            raise ValueError(f'Either s or {radius_key} of a pattern row must hold a start and an end')
+        return cls(row['blade'], row['side'], along, start, end, at, pitch,
+                   int(row.get('Rows') or 1), row_pitch, float(row.get('Stagger') or 0))
+
+    def iter_holes(self, chunk_size=CHUNK_SIZE):
+        per_row = self._holes_per_row(0.0)
+        total = per_row * self.rows
+        for first in range(0, total, chunk_size):
+            index = np.arange(first, min(first + chunk_size, total))
+            row, j = np.divmod(index, per_row)
+            along = self.start + j * self.pitch + (row % 2) * self.stagger * self.pitch
+            across = self.at + row * self.row_pitch
+            keep = along <= self.end + 1e-9 * self.pitch
+            along, across = along[keep], across[keep]
+            if self.along == 's':
+                yield along, across
+            else:
+                yield across, along
+
+
+def get_pattern_parameters(row):
+    """
+    :returns: list of (name, value, unit) of the injection parameters of a pattern row
+    """
+    radius_key = [k for k in row.keys() if re.search(RADIUS_PATTERN, k)][0]
+    hole_diameter_key = [k for k in row.keys() if re.search(HOLE_DIAMETER_PATTERN, k)][0]
+    excluded = ['blade', 's', 'side', radius_key, hole_diameter_key] + PATTERN_KEYS
+    excluded += [key for key in get_angle_keys(row) if key is not None]
+    return [
+        (key.split(' ')[0], val, re.search(UNIT_PATTERN, key).group())
+        for key, val in row.items() if key not in excluded
+    ]
+
+
+def stream_holes(pattern, surface, opposite=None, angles=None, chunk_size=CHUNK_SIZE):
+    """
+    Places the holes of a pattern chunk by chunk
+
+    :param: surface BladeSurface: the blade side of the pattern
+    :param: opposite BladeSurface: the other blade side orienting the normals
+    :param: angles tuple: inclination and compound angles in degrees, legacy
+        axial directions if None
+    :returns: generator of (points, directions) for cfx_export.write_injection_stream
+    """
+    for s, r in pattern.iter_holes(chunk_size):
+        points = surface.place(s, r)
+        if angles is None:
+            yield points, legacy_direction(pattern.blade)
+        else:
+            yield points, hole_directions(surface, s, r, angles[0], angles[1], opposite)
+
+
+def write_patterns(model, patterns, output_dir, coef=1000, chunk_size=CHUNK_SIZE):
+    """
+    Expands the rows of a pattern configuration into Ansys CFX injection
+    files, one per row, without holding all holes in memory
+
+    :param: model doe.GeometryModel: geometry of the blades
+    :param: patterns str or list: a pattern configuration file or its rows
+    :param: output_dir str: a directory of the injection files
+    :returns: dict {pattern number: (a path of the file, a number of holes)}
+    """
+    if isinstance(patterns, str):
+        patterns = read_injection_config(patterns)
+    os.makedirs(output_dir, exist_ok=True)
+
+    written = {}
+    for i, row in enumerate(patterns, 1):
+        pattern = HoleRowPattern.from_row(row)
+        surface, opposite = model.surfaces(pattern.blade, pattern.side)
+        angles = None
+        if has_hole_angles(row):
+            angles = tuple(a[0] for a in get_hole_angles(row, 1))
+        hole_diameter_key = [k for k in row.keys() if re.search(HOLE_DIAMETER_PATTERN, k)][0]
+
+        injection_file = os.path.join(output_dir, f"{pattern.blade}_{pattern.side}_pattern_{i}.csv")
+        holes = write_injection_stream(
+            injection_file, f'Pattern {pattern.blade} {pattern.side} {i}',
+            get_pattern_parameters(row),
+            stream_holes(pattern, surface, opposite, angles, chunk_size),
+            float(row[hole_diameter_key]), coef
+        )
+        logger.info(f'{holes} holes of pattern {i} have been written to {injection_file}')
+        written[i] = (injection_file, holes)
+    return written
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Expand hole row patterns into Ansys CFX injection files')
+    parser.add_argument('patterns', nargs='?', default=os.path.join('.', 'patterns.cfg'),
+                        help='pattern configuration file')
+    parser.add_argument('--geomturbo-dir', default=os.path.join('.', 'geomturbo'),
+                        help='directory of geomTurbo files')
+    parser.add_argument('--output-dir', default=os.path.join('.', 'injections'),
+                        help='directory of the injection files')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help='number of holes placed and written at a time')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        filename=os.path.join('.', 'optimization.log'), level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    with GeometryModel(args.geomturbo_dir) as model:
+        for i, (injection_file, holes) in write_patterns(
+                model, args.patterns, args.output_dir, chunk_size=args.chunk_size).items():
+            print(f'{injection_file}: {holes} holes')
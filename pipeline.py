@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from registry import SectionRegistry
+from geom_cache import GeometryCache
+from geom_loader import load_geometry
+from cfx_export import write_injection_csv
+from injection import COEF, register_sections
+from placement import place_injections
+from decimate import decimate_airfoil
+
+
+QUEUE_SIZE = 2  # Items waiting between two stages
+_DONE = object()
+
+
+class PipelineStopped(Exception):
+    pass
+
+
+def _parse(gt_file, sides, cache_dir):
+    geometry_cache = GeometryCache(cache_dir) if cache_dir else None
+    return gt_file, load_geometry(gt_file, sides, geometry_cache)
+
+
+def prepare_exports(blade, airfoil, rows, injections_dir, coef=COEF, decimate=None):
+    """
+    Registers the sections of a blade in a registry of its own and places
+    the holes of its injections
+
+    :param: blade str: a name of the blade
+    :param: airfoil dict: {side: {section: points}} of the blade
+    :param: rows list: (injection number, injection configuration row) of the blade
+    :param: decimate float: a chordal tolerance the sections are reduced to, full resolution if None
+    :returns: list of (injection number, dict of write_injection_csv arguments)
+    """
+    if decimate is not None:
+        airfoil = decimate_airfoil(airfoil, decimate)[0]
+    registry = SectionRegistry()
+    register_sections(airfoil, blade, registry=registry)
+    return place_injections(rows, registry, injections_dir, coef)
+
+
+class InjectionPipeline:
+
+    """
+    Parses geomTurbo files, places holes and writes injection files as a
+    pipeline, so a file is interpolated and written while others are still
+    being parsed
+
+    Files are parsed by a process pool in the order they complete, holes are
+    placed by a thread and files are written by writer threads. The stages
+    are connected by bounded queues and no more files are parsed ahead than
+    the queues can take, which bounds the geometry held in memory. The first
+    error stops all stages and is raised by run.
+
+    Attributes
+    __________
+    :parameter: injections_dir str: a directory of the injection files
+    :parameter: workers int: a number of parsing processes, os.cpu_count() if None
+    :parameter: writers int: a number of writer threads
+    :parameter: queue_size int: a capacity of the queues between the stages
+    :parameter: cache_dir str: a geometry cache directory, no cache if None
+    :parameter: coef float: model units per meter
+    :parameter: decimate float: a chordal tolerance the sections are reduced to, full resolution if None
+
+    Methods
+    _______
+    run(files):
+        :returns: dict {injection number: (a path of the injection file, a number of holes)}
+    """
+
+    def __init__(self, injections_dir, workers=None, writers=2, queue_size=QUEUE_SIZE,
+                 cache_dir=None, coef=COEF, decimate=None):
+        self.injections_dir = injections_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.writers = max(1, writers)
+        self.queue_size = max(1, queue_size)
+        self.cache_dir = cache_dir
+        self.coef = coef
+        self.decimate = decimate
+        self.__stop = threading.Event()
+        self.__errors = []
+        self.__lock = threading.Lock()
+
+    def _fail(self, er):
+        with self.__lock:
+            self.__errors.append(er)
+        self.__stop.set()
+
+    def _put(self, q, item):
+        while True:
+            if self.__stop.is_set() and item is not _DONE:
+                raise PipelineStopped()
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self.__stop.is_set() and item is _DONE:
+                    return
+
+    def _get(self, q):
+        while True:
+            if self.__stop.is_set():
+                raise PipelineStopped()
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def _interpolate(self, files, parsed, exports):
+        try:
+            while True:
+                item = self._get(parsed)
+                if item is _DONE:
+                    break
+                gt_file, airfoil = item
+                blade, sides, rows = files[gt_file]
+                for export in prepare_exports(blade, airfoil, rows, self.injections_dir,
+                                              self.coef, self.decimate):
+                    self._put(exports, export)
+        except PipelineStopped:
+            pass
+        except BaseException as er:
+            self._fail(er)
+        finally:
+            for _ in range(self.writers):
+                self._put(exports, _DONE)
+
+    def _write(self, exports, written):
+        try:
+            while True:
+                item = self._get(exports)
+                if item is _DONE:
+                    break
+                i, job = item
+                holes = write_injection_csv(**job)
+                with self.__lock:
+                    written[i] = (job['injection_file'], holes)
+        except PipelineStopped:
+            pass
+        except BaseException as er:
+            self._fail(er)
+
+    def run(self, files):
+        """
+        :param: files dict: {gt_file: (blade, sides to load or None, list of
+            (injection number, injection configuration row))}
+        """
+        self.__stop.clear()
+        self.__errors.clear()
+        parsed = queue.Queue(maxsize=self.queue_size)
+        exports = queue.Queue(maxsize=self.queue_size)
+        written = {}
+
+        threads = [threading.Thread(target=self._interpolate, args=(files, parsed, exports))]
+        threads.extend(threading.Thread(target=self._write, args=(exports, written))
+                       for _ in range(self.writers))
+        for thread in threads:
+            thread.start()
+
+        try:
+            todo = list(files)
+            with ProcessPoolExecutor(max_workers=min(self.workers, max(1, len(todo)))) as executor:
+                running = set()
+                while (todo or running) and not self.__stop.is_set():
+                    # Parsed files wait in the queue or in finished futures,
+                    # so files are submitted only while there is room for them
+                    while todo and len(running) < self.workers + self.queue_size - parsed.qsize():
+                        gt_file = todo.pop(0)
+                        running.add(executor.submit(_parse, gt_file, files[gt_file][1], self.cache_dir))
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._put(parsed, future.result())
+                for future in running:
+                    future.cancel()
+        except PipelineStopped:
+            pass
+        except BaseException as er:
+            self._fail(er)
+        finally:
+            self._put(parsed, _DONE)
+            for thread in threads:
+                thread.join()
+
+        if self.__errors:
+            raise self.__errors[0]
+        return written
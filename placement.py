@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+from registry import SectionRegistry
+from injection import (
+    COEF, CLASS_REGISTRY, resolve_registry, build_injection_sections, get_hole_positions, place_holes,
+    get_export_job, has_hole_angles, build_surfaces, get_hole_directions
+)
+
+
+def scoped_registry(blade, registry=CLASS_REGISTRY):
+    """
+    :returns: SectionRegistry of its own with the sections of all sides of a
+        blade, which are shared with the given registry
+    """
+    registry = resolve_registry(registry)
+    scoped = SectionRegistry()
+    for key_blade, side in registry.keys():
+        if key_blade == blade:
+            for section in registry.sections(blade, side):
+                scoped.add(section)
+    return scoped
+
+
+def place_injections(rows, registry, injections_dir, coef=COEF, section_cache=None,
+                     surfaces=None, surfaces_lock=None):
+    """
+    Places the holes of injections of one geometry context
+
+    :param: rows list: (injection number, injection configuration row)
+    :param: registry SectionRegistry: sections of the blades of the rows
+    :param: injections_dir str: a directory of the injection files
+    :param: surfaces dict: {(blade, side): BladeSurface} shared with other calls, see build_surfaces
+    :param: surfaces_lock threading.Lock: a lock guarding a shared surfaces dict
+    :returns: list of (injection number, dict of write_injection_csv arguments)
+    """
+    surfaces = {} if surfaces is None else surfaces
+    surfaces_lock = nullcontext() if surfaces_lock is None else surfaces_lock
+    jobs = []
+    for i, inj in rows:
+        injection_sections = build_injection_sections(
+            inj, i, registry=registry, injection_registry=None, section_cache=section_cache
+        )
+        s, d = get_hole_positions(inj)
+        points = place_holes(injection_sections, s)
+        directions = None
+        if has_hole_angles(inj):
+            with surfaces_lock:
+                blade_surfaces = build_surfaces(inj['blade'], inj['side'], registry, surfaces)
+            directions = get_hole_directions(inj, s, *blade_surfaces)
+        jobs.append((i, get_export_job(inj, i, points, d, injections_dir, coef, directions)))
+    return jobs
+
+
+def place_parallel(rows, injections_dir, registry=CLASS_REGISTRY, workers=None, coef=COEF,
+                   section_cache=None):
+    """
+    Places the holes of independent (blade, side) groups of injections in a
+    thread pool. Every group works on a scoped registry of its blade and
+    keeps its injection sections unregistered, so groups share no mutable
+    state; most of the work runs in NumPy kernels releasing the GIL.
+
+    :param: rows list: (injection number, injection configuration row)
+    :param: workers int: a number of threads, os.cpu_count() if None
+    :returns: list of (injection number, dict of write_injection_csv arguments)
+        in the order of rows
+    :raises: the first error of a group, groups taken in the order of their first rows
+    """
+    registry = resolve_registry(registry)
+    # Groups of the two sides of a blade share the surfaces orienting their normals
+    surfaces, surfaces_lock = {}, threading.Lock()
+    groups = {}
+    for i, inj in rows:
+        groups.setdefault((inj['blade'], inj['side']), []).append((i, inj))
+
+    def place(group):
+        (blade, side), group_rows = group
+        return place_injections(group_rows, scoped_registry(blade, registry), injections_dir,
+                                coef, section_cache, surfaces, surfaces_lock)
+
+    workers = min(workers or os.cpu_count() or 1, max(1, len(groups)))
+    if workers <= 1:
+        placed = [place(group) for group in groups.items()]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            placed = list(executor.map(place, groups.items()))
+
+    jobs = dict(job for group_jobs in placed for job in group_jobs)
+    return [(i, jobs[i]) for i, inj in rows]
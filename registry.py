@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_right
+
+
+class SectionRegistry:
+
+    """
+    A registry of blade sections grouped by (blade, side)
+
+    Sections of each (blade, side) are kept sorted by radius, so the pair of
+    sections embracing a radius is found by binary search. Injection sections
+    are kept apart and indexed by (blade, side, radius).
+
+    Methods
+    _______
+    add(curve):
+        inserts a section keeping the radius order
+    add_injection(curve):
+        indexes an injection section by its blade, side and radius
+    sections(blade, side):
+        :returns: list of sections sorted by radius
+    bracket(blade, side, radius):
+        :returns: tuple of two sections between which lies the radius
+    injection(blade, side, radius):
+        :returns: an injection section or None
+    injections():
+        :returns: list of all injection sections in insertion order
+    clear():
+        removes all sections
+    """
+
+    def __init__(self):
+        self.__radii = {}
+        self.__sections = {}
+        self.__injections = {}
+
+    def __len__(self):
+        return sum(len(s) for s in self.__sections.values()) + len(self.__injections)
+
+    def keys(self):
+        return list(self.__sections.keys())
+
+    def add(self, curve):
+        key = (curve.blade, curve.side)
+        radii = self.__radii.setdefault(key, [])
+        sections = self.__sections.setdefault(key, [])
+        index = bisect_right(radii, curve.radius)
+        radii.insert(index, curve.radius)
+        sections.insert(index, curve)
+
+    def add_injection(self, curve):
+        self.__injections.setdefault((curve.blade, curve.side, curve.radius), curve)
+
+    def sections(self, blade, side):
+        return list(self.__sections.get((blade, side), []))
+
+    def bracket(self, blade, side, radius):
+        """
+        Returns the sections below and above the radius. Outside the radial
+        range the two lowest or the two highest sections are returned.
+
+        :raises: KeyError if there are no sections of the blade side
+        :raises: IndexError if the blade side has a single section
+        """
+        radii = self.__radii[(blade, side)]
+        sections = self.__sections[(blade, side)]
+        index = bisect_right(radii, radius)
+        if index == 0:
+            return sections[1], sections[0]
+        elif index == len(sections):
+            return sections[-1], sections[-2]
+        return sections[index - 1], sections[index]
+
+    def injection(self, blade, side, radius):
+        return self.__injections.get((blade, side, radius))
+
+    def injections(self):
+        return list(self.__injections.values())
+
+    def clear(self):
+        self.__radii.clear()
+        self.__sections.clear()
+        self.__injections.clear()
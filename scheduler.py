@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import shlex
+import shutil
+import logging
+import argparse
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+AUTOGRID_SCRIPT = os.path.join(PACKAGE_DIR, 'autogrid.py')
+# Modules autogrid.py imports inside igg
+AUTOGRID_MODULES = [os.path.join(PACKAGE_DIR, 'geom_index.py')]
+
+AutoGridJob = namedtuple('AutoGridJob', ['name', 'workdir', 'geomturbo_files'])
+AutoGridJob.__new__.__defaults__ = (None,)
+
+JobResult = namedtuple('JobResult', ['name', 'workdir', 'status', 'returncode', 'elapsed', 'log_file'])
+
+
+def split_igg(igg):
+    """
+    Jobs run in their own working directories, so arguments naming existing
+    paths are made absolute against the current directory; an executable
+    without a directory, such as 'igg' or 'python', is left to the PATH search
+
+    :param: igg str or list: an igg executable, a str other than an existing
+        file such as 'python tools/fake_igg.py' is split as a shell command line
+    :returns: list of arguments
+    """
+    if isinstance(igg, str):
+        igg = [igg] if os.path.isfile(igg) else shlex.split(igg, posix=os.name != 'nt')
+    return [
+        os.path.abspath(arg) if os.path.exists(arg) and (n > 0 or os.path.dirname(arg)) else arg
+        for n, arg in enumerate(igg)
+    ]
+
+
+def igg_command(igg, script):
+    """
+    :param: igg str or list: an igg executable, see split_igg
+    :returns: list of arguments of an AutoGrid batch run of a script
+    """
+    return split_igg(igg) + ['-autogrid5', '-batch', '-script', script]
+
+
+def prepare_workdir(workdir, geomturbo_files, template_dir=os.path.join('.', 'autogrid_template')):
+    """
+    Creates an isolated AutoGrid working directory with its own copies of the
+    geomTurbo files, the AutoGrid template and the AutoGrid script
+
+    :returns: str a path of the AutoGrid script in the working directory
+    """
+    geomturbo_dir = os.path.join(workdir, 'geomturbo')
+    os.makedirs(geomturbo_dir, exist_ok=True)
+    for gt_file in geomturbo_files:
+        shutil.copy2(gt_file, geomturbo_dir)
+    if os.path.isdir(template_dir):
+        shutil.copytree(template_dir, os.path.join(workdir, 'autogrid_template'), dirs_exist_ok=True)
+    for module in [AUTOGRID_SCRIPT] + AUTOGRID_MODULES:
+        shutil.copy2(module, workdir)
+    return os.path.join('.', os.path.basename(AUTOGRID_SCRIPT))
+
+
+class AutoGridScheduler:
+
+    """
+    Runs AutoGrid batch jobs concurrently, each in its own working directory
+
+    A job whose geomturbo_files are given gets its working directory
+    prepared by prepare_workdir, otherwise the directory is expected to
+    hold autogrid.py, geomturbo and autogrid_template already. Output of
+    igg goes to autogrid_job.log of the working directory.
+
+    Attributes
+    __________
+    :parameter: igg list: arguments of an igg executable, see split_igg
+    :parameter: max_concurrent int: a number of jobs running at the same time
+    :parameter: timeout float: seconds after which a job is killed, no limit if None
+    :parameter: template_dir str: an AutoGrid template directory copied into prepared working directories
+
+    Methods
+    _______
+    run_job(job):
+        :returns: JobResult of a job
+    run(jobs):
+        :returns: list of JobResult in the order of jobs
+    """
+
+    log_file_name = 'autogrid_job.log'
+
+    def __init__(self, igg='igg', max_concurrent=None, timeout=None,
+                 template_dir=os.path.join('.', 'autogrid_template')):
+        self.igg = split_igg(igg)
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        self.timeout = timeout
+        self.template_dir = template_dir
+
+    def run_job(self, job):
+        log_file = os.path.join(job.workdir, self.log_file_name)
+        start = time.perf_counter()
+        try:
+            if job.geomturbo_files is not None:
+                script = prepare_workdir(job.workdir, job.geomturbo_files, self.template_dir)
+            else:
+                script = os.path.join('.', os.path.basename(AUTOGRID_SCRIPT))
+            command = igg_command(self.igg, script)
+            with open(log_file, 'w') as log:
+                log.write(f'{" ".join(command)}\n')
+                log.flush()
+                returncode = subprocess.run(
+                    command, cwd=job.workdir, stdout=log, stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL, timeout=self.timeout
+                ).returncode
+        except subprocess.TimeoutExpired:
+            logger.error(f'AutoGrid job {job.name} has been killed after {self.timeout} s')
+            return JobResult(job.name, job.workdir, 'timeout', None,
+                             time.perf_counter() - start, log_file)
+        except OSError as er:
+            logger.error(f'AutoGrid job {job.name} has not been started. An error occurs {er}')
+            return JobResult(job.name, job.workdir, 'error', None,
+                             time.perf_counter() - start, log_file)
+
+        elapsed = time.perf_counter() - start
+        if returncode != 0:
+            logger.error(f'AutoGrid job {job.name} failed with exit code {returncode}, see {log_file}')
+            return JobResult(job.name, job.workdir, 'failed', returncode, elapsed, log_file)
+        logger.info(f'AutoGrid job {job.name} has finished in {elapsed:.1f} s')
+        return JobResult(job.name, job.workdir, 'ok', returncode, elapsed, log_file)
+
+    def run(self, jobs):
+        jobs = list(jobs)
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrent, len(jobs))) as executor:
+            return list(executor.map(self.run_job, jobs))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description='Run AutoGrid on several geomTurbo directories concurrently'
+    )
+    parser.add_argument('geomturbo_dirs', nargs='+',
+                        help='directories of geomTurbo files, one AutoGrid job each')
+    parser.add_argument('--jobs-dir', default=os.path.join('.', 'autogrid_jobs'),
+                        help='directory of the job working directories')
+    parser.add_argument('--igg', default='igg', help='igg executable and its leading arguments')
+    parser.add_argument('--max-concurrent', type=int, default=None,
+                        help='number of jobs running at the same time, CPU count if omitted')
+    parser.add_argument('--timeout', type=float, default=None, help='seconds per job')
+    parser.add_argument('--template-dir', default=os.path.join('.', 'autogrid_template'),
+                        help='AutoGrid template directory')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        filename=os.path.join('.', 'optimization.log'), level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    jobs = []
+    for geomturbo_dir in args.geomturbo_dirs:
+        name = os.path.basename(os.path.normpath(geomturbo_dir))
+        gt_files = [os.path.join(geomturbo_dir, f) for f in sorted(os.listdir(geomturbo_dir))
+                    if os.path.splitext(f)[1] == '.geomTurbo']
+        jobs.append(AutoGridJob(name, os.path.join(args.jobs_dir, name), gt_files))
+
+    scheduler = AutoGridScheduler(args.igg, args.max_concurrent, args.timeout, args.template_dir)
+    results = scheduler.run(jobs)
+    for result in results:
+        print(f'{result.name}: {result.status} (exit code {result.returncode}, '
+              f'{result.elapsed:.1f} s) {result.log_file}')
+    sys.exit(0 if all(result.status == 'ok' for result in results) else 1)
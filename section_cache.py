@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+
+class SectionCache:
+
+    """
+    A least recently used cache of injection sections
+
+    Sections are keyed by blade, side and radius quantized to the
+    tolerance, so radii closer than about the tolerance share the section
+    built for the first of them. Arc lengths of a section are computed when
+    it is stored, so a cached section is evaluated without interpolation.
+    The least recently used sections are evicted when the number of
+    sections or their memory exceeds the limits. A cache belongs to one
+    geometry and must be cleared when the geometry changes.
+
+    Attributes
+    __________
+    :parameter: max_entries int: a maximum number of sections
+    :parameter: max_bytes int: a maximum memory of the section arrays
+    :parameter: tolerance float: a radius quantization step in model units
+    :parameter: hits int: a number of sections found in the cache
+    :parameter: misses int: a number of sections built
+    :parameter: evictions int: a number of evicted sections
+
+    Methods
+    _______
+    key(blade, side, radius):
+        :returns: tuple a cache key
+    get(blade, side, radius, build):
+        :returns: a cached section or the section returned by build()
+    stats():
+        :returns: dict of hits, misses, evictions, entries, bytes and hit rate
+    clear():
+        removes all sections and resets the statistics
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=256 * 2 ** 20, tolerance=1e-6):
+        if tolerance <= 0.0:
+            raise ValueError(f'A radius tolerance must be positive, got {tolerance}')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__sections = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__sections)
+
+    def key(self, blade, side, radius):
+        return blade, side, round(radius / self.tolerance)
+
+    @staticmethod
+    def _size(section):
+        return sum(array.nbytes for array in (section.points, section.lengths, section.cumulative_lengths)
+                   if array is not None)
+
+    def get(self, blade, side, radius, build):
+        key = self.key(blade, side, radius)
+        with self.__lock:
+            entry = self.__sections.get(key)
+            if entry is not None:
+                self.__sections.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Built outside the lock, a section built twice concurrently is stored once
+        section = build()
+        section.set_piece_lengths()
+        size = self._size(section)
+        if size > self.max_bytes:
+            return section
+
+        with self.__lock:
+            if key not in self.__sections:
+                self.__sections[key] = (section, size)
+                self.__bytes += size
+                while len(self.__sections) > self.max_entries or self.__bytes > self.max_bytes:
+                    evicted, evicted_size = self.__sections.popitem(last=False)[1]
+                    self.__bytes -= evicted_size
+                    self.evictions += 1
+        return section
+
+    def stats(self):
+        with self.__lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self.__sections), 'bytes': self.__bytes,
+                'hit_rate': self.hits / requests if requests else 0.0
+            }
+
+    def clear(self):
+        with self.__lock:
+            self.__sections.clear()
+            self.__bytes = 0
+            self.hits = self.misses = self.evictions = 0
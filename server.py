@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+
+from doe import GeometryModel
+
+
+logger = logging.getLogger(__name__)
+
+
+class GeometryLoadError(RuntimeError):
+    pass
+
+
+def geomturbo_snapshot(geomturbo_dir):
+    """
+    :returns: tuple of (name, size, mtime) of the geomTurbo files of a directory
+    """
+    try:
+        entries = sorted(os.scandir(geomturbo_dir), key=lambda e: e.name)
+    except FileNotFoundError:
+        return ()
+    return tuple(
+        (e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in entries
+        if os.path.splitext(e.name)[1] == '.geomTurbo'
+    )
+
+
+def normalize_row(row):
+    # Rows come with the same columns as injections.cfg; lists and numbers
+    # are turned into the space separated strings of the configuration file
+    return {
+        key: ' '.join(str(v) for v in val) if isinstance(val, (list, tuple)) else str(val)
+        for key, val in row.items()
+    }
+
+
+class InjectionServer:
+
+    """
+    Serves injection requests against geometry kept in memory
+
+    A request is a JSON object on a line, a reply is a JSON object on a line:
+        {"id": 1, "injections": [{"blade": "rb1", "side": "suction", ...}],
+         "output_dir": "injections"}
+        {"id": 1, "status": "ok", "holes": {"1": [[x, y, z], ...]},
+         "files": {"1": "injections/rb1_suction_injection_1.csv"},
+         "reloaded": false, "latency_ms": 1.2}
+    "injections_cfg" may name a configuration file instead of "injections",
+    without "output_dir" no files are written. Requests with "command" set
+    to "ping", "reload" or "shutdown" control the server, a reply to "ping"
+    holds statistics of the section cache of the geometry. Geometry is
+    reloaded before a request whenever a geomTurbo file of the directory
+    has been added, removed or modified.
+
+    Attributes
+    __________
+    :parameter: geomturbo_dir str: a directory of geomTurbo files
+    :parameter: cache_dir str: a geometry cache directory, no cache if None
+    :parameter: workers int: a number of processes parsing geomTurbo files
+
+    Methods
+    _______
+    model():
+        :returns: GeometryModel of the current geomTurbo files
+    handle(request):
+        :returns: dict a reply to a request
+    handle_line(line):
+        :returns: str a JSON reply to a JSON request
+    serve_stream(instream, outstream):
+        serves requests read line by line until the end of the stream or shutdown
+    serve_unix(socket_path):
+        serves requests of clients of a Unix socket until shutdown
+    close():
+        releases the geometry
+    """
+
+    def __init__(self, geomturbo_dir=os.path.join('.', 'geomturbo'), cache_dir=None, workers=1):
+        self.geomturbo_dir = geomturbo_dir
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.__lock = threading.Lock()
+        self.__model = None
+        self.__snapshot = None
+        self.__shutdown = threading.Event()
+        self.__socket_server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.__lock:
+            if self.__model is not None:
+                self.__model.close()
+                self.__model = None
+
+    def model(self, force=False):
+        """
+        The new geometry replaces the current one only once it has been
+        loaded, so a file that is still being written leaves the current
+        geometry in place and is loaded again by the next request
+
+        :returns: tuple of GeometryModel and bool whether the geometry has been reloaded
+        :raises: GeometryLoadError if the geomTurbo files cannot be loaded
+        """
+        with self.__lock:
+            snapshot = geomturbo_snapshot(self.geomturbo_dir)
+            if self.__model is not None and snapshot == self.__snapshot and not force:
+                return self.__model, False
+            try:
+                model = GeometryModel(self.geomturbo_dir, self.cache_dir, self.workers)
+            except Exception as er:
+                raise GeometryLoadError(
+                    f'Geometry of {self.geomturbo_dir} has not been loaded. An error occurs {er!r}'
+                ) from er
+            if self.__model is not None:
+                self.__model.close()
+            self.__model = model
+            self.__snapshot = snapshot
+            logger.info(f'Geometry of {len(snapshot)} geomTurbo files has been loaded '
+                        f'from {self.geomturbo_dir}')
+            return self.__model, True
+
+    def handle(self, request):
+        start = time.perf_counter()
+        reply = {'id': request.get('id')}
+        command = request.get('command', 'evaluate')
+        try:
+            if command == 'ping':
+                model = self.__model
+                if model is not None and model.section_cache is not None:
+                    reply['section_cache'] = model.section_cache.stats()
+                reply['status'] = 'ok'
+            elif command == 'shutdown':
+                self.__shutdown.set()
+                if self.__socket_server is not None:
+                    threading.Thread(target=self.__socket_server.shutdown).start()
+                reply['status'] = 'ok'
+            elif command == 'reload':
+                reply['reloaded'] = self.model(force=True)[1]
+                reply['status'] = 'ok'
+            elif command == 'evaluate':
+                model, reply['reloaded'] = self.model()
+                if 'injections_cfg' in request:
+                    injections = request['injections_cfg']
+                else:
+                    injections = [normalize_row(row) for row in request['injections']]
+                result = model.evaluate(injections, request.get('output_dir'))
+                reply['holes'] = {str(i): points.tolist() for i, points in result.holes.items()}
+                reply['files'] = {str(i): f for i, f in result.files.items()}
+                reply['status'] = 'ok'
+            else:
+                raise ValueError(f'Unknown command {command}')
+        except (ValueError, KeyError, IndexError, TypeError, OSError, GeometryLoadError) as er:
+            logger.error(f'Request {reply["id"]} failed. An error occurs {er!r}')
+            reply['status'] = 'error'
+            reply['error'] = f'{er.__class__.__name__}: {er}'
+        except Exception as er:
+            # Client input must not take the server down
+            logger.exception(f'Request {reply["id"]} failed. An unexpected error occurs {er!r}')
+            reply['status'] = 'error'
+            reply['error'] = f'{er.__class__.__name__}: {er}'
+        reply['latency_ms'] = (time.perf_counter() - start) * 1000
+        return reply
+
+    def handle_line(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('A request must be a JSON object')
+        except ValueError as er:
+            return json.dumps({'id': None, 'status': 'error', 'error': f'Invalid request: {er}'})
+        return json.dumps(self.handle(request))
+
+    def serve_stream(self, instream=sys.stdin, outstream=sys.stdout):
+        for line in instream:
+            if not line.strip():
+                continue
+            outstream.write(self.handle_line(line) + '\n')
+            outstream.flush()
+            if self.__shutdown.is_set():
+                break
+
+    def serve_unix(self, socket_path):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError('Unix sockets are not supported on this system, serve stdin instead')
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    self.wfile.write((server.handle_line(line.decode('utf-8')) + '\n').encode('utf-8'))
+                    self.wfile.flush()
+
+        with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as socket_server:
+            socket_server.daemon_threads = True
+            self.__socket_server = socket_server
+            try:
+                socket_server.serve_forever()
+            finally:
+                self.__socket_server = None
+                os.remove(socket_path)
+
+
+def serve(socket_path=None, geomturbo_dir=os.path.join('.', 'geomturbo'), cache_dir=None, workers=1):
+    """
+    Loads the geometry and serves requests on a Unix socket, or on stdin and
+    stdout if socket_path is None
+    """
+    with InjectionServer(geomturbo_dir, cache_dir, workers) as server:
+        try:
+            server.model()
+        except GeometryLoadError as er:
+            # Requests load the geometry again once the files are complete
+            logger.error(f'{er}')
+        if socket_path is None:
+            server.serve_stream()
+        else:
+            server.serve_unix(socket_path)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Serve injection requests against resident geometry')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='Unix socket to listen on, stdin and stdout if omitted')
+    parser.add_argument('--geomturbo-dir', default=os.path.join('.', 'geomturbo'),
+                        help='directory of geomTurbo files')
+    parser.add_argument('--cache-dir', default=None,
+                        help='directory of the parsed geomTurbo geometry cache')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes parsing geomTurbo files in parallel')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        filename=os.path.join('.', 'optimization.log'), level=logging.ERROR,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    serve(args.socket, args.geomturbo_dir, args.cache_dir, args.workers)
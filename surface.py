@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from intersection import intersect_radius
+
+
+class BladeSurface:
+
+    """
+    A blade side resampled onto a structured (radius, s) grid
+
+    Every section is resampled once at the same normalized arc lengths s, so
+    points of neighbouring sections with the same s form the grid lines
+    across the span. A hole at (s, r) is found on the grid line through s
+    of the two sections embracing r, intersected with the cylinder of
+    radius r, which is the batched counterpart of building an intermediate
+    injection section and evaluating it at s.
+
+    Attributes
+    __________
+    :parameter: blade str: a name of a blade
+    :parameter: side str: a side of the blade
+    :parameter: radii numpy.ndarray (K,): section radii in ascending order
+    :parameter: s numpy.ndarray (S,): normalized arc lengths of the grid
+    :parameter: grid numpy.ndarray (K x S x 3): resampled section points
+    :parameter: grid_ds numpy.ndarray (K x S x 3): derivatives of the grid along s
+
+    Methods
+    _______
+    from_registry(registry, blade, side, num_s=None):
+        :returns: BladeSurface of the registered sections of a blade side
+    place(s, r):
+        :returns: numpy.ndarray (M x 3) of points at pairs (s, r)
+    place_grid(s, r):
+        :returns: numpy.ndarray (len(r) x len(s) x 3) of points at every s of every radius
+    tangents(s, r):
+        :returns: tuple of numpy.ndarray (M x 3) of derivatives along s and
+        along the radius at pairs (s, r)
+    """
+
+    def __init__(self, sections, num_s=None, blade=None, side=None):
+        sections = sorted(sections, key=lambda sec: sec.radius)
+        if len(sections) < 2:
+            raise ValueError(f'A blade surface needs at least two sections, got {len(sections)}')
+        if num_s is None:
+            num_s = 4 * max(len(sec.points) for sec in sections)
+
+        self.blade = blade if blade is not None else sections[0].blade
+        self.side = side if side is not None else sections[0].side
+        self.radii = np.array([sec.radius for sec in sections], dtype=np.float64)
+        self.s = np.linspace(0.0, 1.0, num_s)
+        self.grid = np.stack([sec.get_abs_coordinates(self.s) for sec in sections])
+        self.grid_ds = np.gradient(self.grid, self.s, axis=1)
+
+    @classmethod
+    def from_registry(cls, registry, blade, side, num_s=None):
+        return cls(registry.sections(blade, side), num_s, blade, side)
+
+    def _grid_points(self, k, s, grid=None):
+        # Linear interpolation along s on the grid rows k
+        grid = self.grid if grid is None else grid
+        position = s * (len(self.s) - 1)
+        i = np.clip(np.floor(position).astype(np.intp), 0, len(self.s) - 2)
+        w = (position - i)[:, None]
+        return (1.0 - w) * grid[k, i] + w * grid[k, i + 1]
+
+    def _bracket(self, s, r):
+        s, r = np.broadcast_arrays(np.asarray(s, dtype=np.float64), np.asarray(r, dtype=np.float64))
+        s, r = s.reshape(-1), r.reshape(-1)
+        # Sections embracing each radius, the nearest pair outside the range
+        k = np.clip(np.searchsorted(self.radii, r, side='right') - 1, 0, len(self.radii) - 2)
+        return s, r, k
+
+    def place(self, s, r):
+        """
+        :param: s array-like: normalized arc lengths
+        :param: r array-like: radii, broadcast against s
+        :returns: numpy.ndarray (M x 3)
+        """
+        s, r, k = self._bracket(s, r)
+        lower = self._grid_points(k, s)
+        upper = self._grid_points(k + 1, s)
+
+        crossing = intersect_radius(lower, upper, r)
+        # Fall back to linear interpolation in radius where the grid line
+        # does not reach the cylinder
+        weight = (r - self.radii[k]) / (self.radii[k + 1] - self.radii[k])
+        t = np.where(crossing.valid, crossing.t, weight)
+        return lower + t[:, None] * (upper - lower)
+
+    def place_grid(self, s, r):
+        s = np.asarray(s, dtype=np.float64).reshape(-1)
+        r = np.asarray(r, dtype=np.float64).reshape(-1)
+        return self.place(s[None, :], r[:, None]).reshape(len(r), len(s), 3)
+
+    def tangents(self, s, r):
+        """
+        :param: s array-like: normalized arc lengths
+        :param: r array-like: radii, broadcast against s
+        :returns: tuple of numpy.ndarray (M x 3) dp/ds and dp/dr, both
+            interpolated linearly in radius between the embracing sections
+        """
+        s, r, k = self._bracket(s, r)
+        dr = (self.radii[k + 1] - self.radii[k])[:, None]
+        weight = (r[:, None] - self.radii[k][:, None]) / dr
+        ds_lower = self._grid_points(k, s, self.grid_ds)
+        ds_upper = self._grid_points(k + 1, s, self.grid_ds)
+        dp_ds = ds_lower + weight * (ds_upper - ds_lower)
+        dp_dr = (self._grid_points(k + 1, s) - self._grid_points(k, s)) / dr
+        return dp_ds, dp_dr
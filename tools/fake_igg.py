@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+A stand-in for igg running AutoGrid batch scripts without NUMECA
+
+It accepts the igg command line '-autogrid5 -batch -script <file>', waits
+for a simulated runtime and writes ./autogrid/hpt.trb listing the geomTurbo
+files of the working directory. Behaviour is controlled by environment
+variables:
+
+    FAKE_IGG_RUNTIME     seconds to run, 0 by default
+    FAKE_IGG_EXIT_CODE   exit code of every run, 0 by default
+    FAKE_IGG_FAIL_RATE   probability of a run failing with exit code 1, 0 by default
+
+Usage:
+    python main.py --igg "python tools/fake_igg.py"
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='igg stand-in')
+    parser.add_argument('-autogrid5', action='store_true')
+    parser.add_argument('-batch', action='store_true')
+    parser.add_argument('-script', required=True)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.script):
+        print(f'fake igg: script {args.script} has not been found')
+        sys.exit(2)
+
+    runtime = float(os.environ.get('FAKE_IGG_RUNTIME', 0))
+    exit_code = int(os.environ.get('FAKE_IGG_EXIT_CODE', 0))
+    fail_rate = float(os.environ.get('FAKE_IGG_FAIL_RATE', 0))
+
+    print(f'fake igg: running {args.script} in {os.getcwd()} for {runtime} s')
+    sys.stdout.flush()
+    time.sleep(runtime)
+
+    if exit_code == 0 and random.random() < fail_rate:
+        exit_code = 1
+    if exit_code != 0:
+        print(f'fake igg: simulated failure with exit code {exit_code}')
+        sys.exit(exit_code)
+
+    geomturbo_dir = os.path.join('.', 'geomturbo')
+    geomturbo_files = sorted(f for f in os.listdir(geomturbo_dir)
+                             if os.path.splitext(f)[1] == '.geomTurbo')
+    os.makedirs(os.path.join('.', 'autogrid'), exist_ok=True)
+    with open(os.path.join('.', 'autogrid', 'hpt.trb'), 'w') as f:
+        f.write('\n'.join(geomturbo_files) + '\n')
+    print(f'fake igg: mesh of {len(geomturbo_files)} geomTurbo files has been saved')
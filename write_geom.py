@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+import os
+import argparse
+
+import numpy as np
+
+from registry import SectionRegistry
+from geom_index import index_geomturbo
+from parse_geom import load_sections
+from injection import (
+    register_sections, build_injection_section, get_injection_radii,
+    read_injection_config, get_blade_name
+)
+
+
+PRECISION = 9  # Decimals of the written coordinates
+RADIUS_TOLERANCE = 1e-6  # Hole radii this close to a section are not inserted
+_ROW_FORMATS = {}
+
+
+def format_points(points, precision=PRECISION):
+    """
+    Formats points as 'x y z' lines with a single %-formatting of all values,
+    which is several times faster than numpy.savetxt
+
+    :param: points numpy.ndarray (N x 3)
+    :returns: str
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    row = _ROW_FORMATS.get(precision)
+    if row is None:
+        row = _ROW_FORMATS.setdefault(precision, ' '.join([f'%.{precision}f'] * 3) + '\n')
+    return (row * len(points)) % tuple(points.ravel().tolist())
+
+
+def write_sections(f, sections, precision=PRECISION):
+    """
+    Writes the sections of one side, each formatted and written on its own,
+    so no more than a section of text is held in memory
+
+    :param: f file: a text file opened for writing
+    :param: sections sequence: numpy.ndarray (N x 3) or callables returning
+        them, which lets sections be built while they are written
+    """
+    f.write(f'SECTIONAL\n{len(sections)}\n')
+    for j, section in enumerate(sections, 1):
+        points = section() if callable(section) else section
+        f.write(f'# section {j}\nXYZ\n{len(points)}\n')
+        f.write(format_points(points, precision))
+
+
+def _copy_text(src, f, start, end, chunk_size=1 << 20):
+    src.seek(start)
+    while start < end:
+        chunk = src.read(min(chunk_size, end - start))
+        if not chunk:
+            break
+        f.write(chunk.decode('latin-1'))
+        start += len(chunk)
+
+
+def write_geomturbo(gt_file, sides, row_name='row', template=None, precision=PRECISION):
+    """
+    Writes a geomTurbo file of one NIROW with one NIBLADEGEOMETRY block
+
+    With a template geomTurbo file everything but the sides of its first
+    blade geometry, e.g. the channel curves and the row parameters, is
+    copied from the template as it is and row_name is ignored.
+
+    :param: gt_file str: a path of the written file
+    :param: sides dict: {side: sequence of sections}, see write_sections
+    :param: template str: a path of a geomTurbo file the rest of the file is copied from
+    :param: precision int: decimals of the coordinates
+    """
+    if template is None:
+        with open(gt_file, 'w') as f:
+            f.write('GEOMETRY TURBO\nVERSION 5.5\nTOLERANCE 1e-06\n')
+            f.write(f'NI_BEGIN NIROW\nNAME {row_name}\nTYPE normal\nPERIODICITY 40\n')
+            f.write('NI_BEGIN NIBLADE\nNAME Main Blade\nNI_BEGIN NIBLADEGEOMETRY\n')
+            f.write('TYPE GEOMTURBO\nGEOMETRY_MODIFIED 0\nGEOMETRY TURBO VERSION 5\n')
+            for side, sections in sides.items():
+                f.write(f'{side}\n')
+                write_sections(f, sections, precision)
+            f.write('NI_END NIBLADEGEOMETRY\nNI_END NIBLADE\nNI_END NIROW\nNI_END GEOMTURBO\n')
+        return
+
+    index = index_geomturbo(template)
+    if not index.blade_geometry or not index.sides:
+        raise ValueError(f'{template} has no blade geometry to replace')
+    begin, end = min(index.sides.values()), index.blade_geometry[0][1]
+    with open(template, 'rb') as src, open(gt_file, 'w', encoding='latin-1', newline='') as f:
+        _copy_text(src, f, 0, begin)
+        for side, sections in sides.items():
+            f.write(f'{side}\n')
+            write_sections(f, sections, precision)
+        _copy_text(src, f, end, os.fstat(src.fileno()).st_size)
+
+
+def refine_sections(airfoil, radii, blade='blade'):
+    """
+    Inserts sections at the given radii between the sections of every side.
+    Only radii within the radial range of all sides and not on an existing
+    section are inserted, so all sides keep the same number of sections.
+
+    :param: airfoil dict: {side: {section: points}}
+    :param: radii iterable: radii in model units, e.g. the radii of injection holes
+    :returns: tuple of dict {side: list of numpy.ndarray (N x 3) sorted by radius}
+        and list of the inserted radii
+    :raises: UnreachableRadiusError if some point pairs cannot reach a radius
+    """
+    registry = SectionRegistry()
+    register_sections(airfoil, blade, registry=registry)
+    sections = {side: registry.sections(blade, side) for side in airfoil}
+    sections = {side: curves for side, curves in sections.items() if curves}
+    if not sections:
+        return {side: [] for side in airfoil}, []
+
+    low = max(curves[0].radius for curves in sections.values())
+    high = min(curves[-1].radius for curves in sections.values())
+    existing = np.array(sorted(c.radius for curves in sections.values() for c in curves))
+    inserted = [r for r in sorted(set(radii)) if low < r < high
+                and np.abs(existing - r).min() > RADIUS_TOLERANCE]
+
+    refined = {}
+    for side, curves in sections.items():
+        curves = curves + [build_injection_section(blade, side, r, n, registry, None)
+                           for n, r in enumerate(inserted)]
+        refined[side] = [c.points for c in sorted(curves, key=lambda c: c.radius)]
+    return refined, inserted
+
+
+def refine_geomturbo(gt_file, out_file, radii, blade=None, precision=PRECISION):
+    """
+    Writes a copy of a geomTurbo file with sections inserted at the given radii
+
+    :returns: list of the inserted radii
+    """
+    airfoil = load_sections(gt_file)
+    refined, inserted = refine_sections(airfoil, radii, blade or 'blade')
+    write_geomturbo(out_file, refined, template=gt_file, precision=precision)
+    return inserted
+
+
+def injection_radii(injections, blade):
+    """
+    :param: injections list: injection configuration rows
+    :returns: list of sorted radii of the holes of a blade in model units
+    """
+    return sorted({r for inj in injections if inj['blade'] == blade for r in get_injection_radii(inj)})
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description='Write geomTurbo files refined with sections at the radii of injection holes'
+    )
+    parser.add_argument('geomturbo', nargs='+', help='geomTurbo files to refine')
+    parser.add_argument('--injections', default=os.path.join('.', 'injections.cfg'),
+                        help='injection configuration file')
+    parser.add_argument('--output-dir', default=os.path.join('.', 'geomturbo_refined'),
+                        help='directory of the written files')
+    parser.add_argument('--precision', type=int, default=PRECISION,
+                        help='decimals of the written coordinates')
+    args = parser.parse_args()
+
+    injections = read_injection_config(args.injections)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for gt_file in args.geomturbo:
+        blade = get_blade_name(gt_file)
+        out_file = os.path.join(args.output_dir, os.path.basename(gt_file))
+        inserted = refine_geomturbo(gt_file, out_file, injection_radii(injections, blade), blade,
+                                    args.precision)
+        print(f'{out_file}: {len(inserted)} sections inserted')